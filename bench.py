@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from engine import HalmaState
+from learn import LinearEvaluator
+from search import Searcher
+
+# Micro-benchmarks of move generation, evaluation and search on fixed
+# positions, compared against a saved baseline so a slowdown fails loudly:
+#
+#   python bench.py --save                 # record bench_baseline.json
+#   python bench.py                        # compare, exit 1 on a regression
+#
+# Rates are the best of --repeat runs. Memory is the tracemalloc high-water
+# mark of one search, measured in a separate run so tracing does not slow
+# the timed ones. Node counts of the fixed-depth searches are deterministic;
+# a change there means the search itself changed and is reported, not failed.
+# learned_nodes_per_s runs the same search scored by learn.LinearEvaluator
+# (with the hand-tuned weights, so it needs no weights file).
+
+RATES = ('movegen_calls_per_s', 'moves_per_s', 'evals_per_s', 'batch_evals_per_s', 'nodes_per_s', 'learned_nodes_per_s')
+MEMORY = ('search_peak_kib',)
+# how much slower than the heuristic a search scored by the learned
+# evaluator may run, baseline or not
+LEARNED_SLOWDOWN = 2.0
+
+# A dense middle game on 10x10: most pieces on the odd squares of the board,
+# so a piece on an even square can chain jumps diagonally across it.
+def dense_position():
+    state = HalmaState(10)
+    squares = [r * 10 + c for r in range(1, 10, 2) for c in range(1, 10, 2)]
+    squares += [r * 10 + c for r in (2, 4, 6, 8) for c in (2, 4, 6, 8) if 6 <= r + c <= 12][:5]
+    squares.sort()
+    state.set_position({'green': sum(1 << sq for sq in squares[::2]), 'red': sum(1 << sq for sq in squares[1::2])}, 'green')
+    return state
+
+# name -> (position factory, search depth)
+POSITIONS = {
+    '8x8': (lambda: HalmaState(8), 4),
+    '10x10': (lambda: HalmaState(10), 4),
+    '16x16': (lambda: HalmaState(16), 3),
+    'dense': (dense_position, 3),
+    '16x16-4p': (lambda: HalmaState(16, players=4), 3),
+    'star-6p': (lambda: HalmaState(4, topology='star', players=6), 4),
+}
+
+def best_time(run, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_position(make_state, depth, repeat, iterations):
+    state = make_state()
+    player = state.which_player
+    result = {}
+    moves = {color: state.evaluate_moves(color) for color in state.colors}
+    def movegen():
+        for _ in range(iterations):
+            for color in state.colors:
+                state.evaluate_moves(color)
+    seconds = best_time(movegen, repeat)
+    result['movegen_calls_per_s'] = iterations * len(state.colors) / seconds
+    result['moves_per_s'] = iterations * sum(len(m) for m in moves.values()) / seconds
+    def evals():
+        for _ in range(iterations * 10):
+            state.heuristic(player)
+    result['evals_per_s'] = iterations * 10 / best_time(evals, repeat)
+    children = moves[player]
+    def batch_evals():
+        for _ in range(iterations):
+            state.evaluate_children(children, player)
+    result['batch_evals_per_s'] = iterations * len(children) / best_time(batch_evals, repeat)
+    def search():
+        searcher = Searcher(tt_size=1 << 16)
+        searcher.search(state, player, depth)
+        result['nodes'] = searcher.nodes
+    seconds = best_time(search, repeat)
+    result['nodes_per_s'] = result['nodes'] / seconds
+    evaluator = LinearEvaluator.from_weights()
+    def learned_search():
+        searcher = Searcher(tt_size=1 << 16, evaluator=evaluator)
+        searcher.search(state, player, depth)
+        result['learned_nodes'] = searcher.nodes
+    seconds = best_time(learned_search, repeat)
+    result['learned_nodes_per_s'] = result['learned_nodes'] / seconds
+    tracemalloc.start()
+    search()
+    result['search_peak_kib'] = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return result
+
+def run(names, repeat, iterations):
+    results = {}
+    for name in names:
+        make_state, depth = POSITIONS[name]
+        results[name] = bench_position(make_state, depth, repeat, iterations)
+    return results
+
+# The regressions of results against baseline, as printable lines.
+def compare(results, baseline, tolerance):
+    failures = []
+    for name, current in results.items():
+        if current['learned_nodes_per_s'] * LEARNED_SLOWDOWN < current['nodes_per_s']:
+            failures.append(f"{name} learned_nodes_per_s: {current['learned_nodes_per_s']:.0f} < nodes_per_s {current['nodes_per_s']:.0f} / {LEARNED_SLOWDOWN}")
+        old = baseline.get(name)
+        if old is None:
+            continue
+        for metric in RATES:
+            if metric in old and current[metric] < old[metric] * (1 - tolerance):
+                failures.append(f"{name} {metric}: {current[metric]:.0f} < baseline {old[metric]:.0f}")
+        for metric in MEMORY:
+            if metric in old and current[metric] > old[metric] * (1 + tolerance):
+                failures.append(f"{name} {metric}: {current[metric]:.0f} > baseline {old[metric]:.0f}")
+        if 'nodes' in old and current['nodes'] != old['nodes']:
+            print(f"note: {name} search visits {current['nodes']} nodes, baseline {old['nodes']}")
+    return failures
+
+def report(results, baseline):
+    columns = ('nodes',) + RATES + MEMORY
+    print(f"{'position':10}" + ''.join(f"{column:>20}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:10}" + ''.join(f"{result[column]:20.0f}" for column in columns))
+        old = baseline.get(name)
+        if old is not None:
+            print(f"{'  vs base':10}" + ''.join(f"{result[c] / old[c]:20.2f}" if old.get(c) else f"{'':20}" for c in columns))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark move generation, evaluation and search against a baseline.")
+    parser.add_argument('--positions', nargs='+', default=list(POSITIONS), choices=list(POSITIONS), help="positions to run")
+    parser.add_argument('--baseline', default='bench_baseline.json', help="baseline JSON file")
+    parser.add_argument('--save', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown or memory growth before failing")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per measurement, the best one counts")
+    parser.add_argument('--iterations', type=int, default=200, help="calls per movegen and evaluation run")
+    args = parser.parse_args(argv)
+    results = run(args.positions, args.repeat, args.iterations)
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    report(results, baseline)
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': sys.version, 'platform': platform.platform(), 'results': results}, f, indent=2)
+        print(f"baseline -> {args.baseline}")
+        return 0
+    failures = compare(results, baseline, args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import argparse
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from engine import HalmaState
+from search import Searcher
+
+# Opening book: position key -> best move and score, found by deep searches
+# offline, so the first moves of a game are answered without searching.
+#
+# File layout (little endian): a header of magic, version, board size and
+# entry count, then fixed-size records sorted by key so a lookup is a
+# binary search straight over the memory-mapped file.
+#
+#   python book.py --size 8 --plies 2 --line-plies 6 --depth 4 --out opening_book_8x8.bin
+
+MAGIC = b'HBOK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+# key, from square, to square, score, search depth
+RECORD = struct.Struct('<QHHfH')
+
+def position_key(state, player):
+    return state.key ^ state.tables.side_keys[player]
+
+class OpeningBook:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.board_size, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+    # The book for this board size that sits next to the game, if any.
+    @classmethod
+    def find(cls, board_size):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), f'opening_book_{board_size}x{board_size}.bin')
+        return cls(path) if os.path.exists(path) else None
+    def close(self):
+        self.data.close()
+    def record(self, index):
+        return RECORD.unpack_from(self.data, HEADER.size + index * RECORD.size)
+    # (move, score) for player to move in state, or None when the position
+    # is not in the book. The move is checked for legality, so a key
+    # collision cannot produce an illegal move.
+    def lookup(self, state, player):
+        # books only cover the two-player square board
+        if state.rows != self.board_size or state.topology != 'square' or state.players != 2:
+            return None
+        key = position_key(state, player)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.record(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.count:
+            return None
+        record_key, frm, to, score, _ = self.record(low)
+        if record_key != key or (frm, to) not in state.evaluate_moves(player):
+            return None
+        return (frm, to), score
+
+def write_book(path, board_size, entries):
+    entries = sorted(entries.items())
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, board_size, len(entries)))
+        for key, (move, score, depth) in entries:
+            f.write(RECORD.pack(key, move[0], move[1], score, depth))
+
+# Book positions: every position up to `plies` plies from the start, then
+# the engine's own line for `line_plies` more from each of them.
+def book_positions(board_size, plies, line_plies, depth):
+    state = HalmaState(board_size)
+    frontier = [state.snapshot()]
+    positions = {}
+    for _ in range(plies):
+        next_frontier = []
+        for snapshot in frontier:
+            state = HalmaState.from_snapshot(snapshot)
+            player = state.which_player
+            positions[position_key(state, player)] = snapshot
+            for move in state.evaluate_moves(player):
+                state.make_move(move)
+                state.switch_player()
+                next_frontier.append(state.snapshot())
+                state.switch_player()
+                state.unmake_move()
+        frontier = next_frontier
+    searcher = Searcher()
+    for snapshot in frontier:
+        state = HalmaState.from_snapshot(snapshot)
+        for _ in range(line_plies + 1):
+            player = state.which_player
+            key = position_key(state, player)
+            if key in positions or state.check_for_win():
+                break
+            positions[key] = state.snapshot()
+            move, _ = searcher.search(state, player, max(1, depth - 2))
+            if move is None:
+                break
+            state.make_move(move)
+            state.switch_player()
+    return positions
+
+def _search_position(snapshot, depth):
+    state = HalmaState.from_snapshot(snapshot)
+    move, score = Searcher().search(state, state.which_player, depth)
+    return move, score
+
+def build_book(path, board_size, plies=2, line_plies=6, depth=4, workers=None):
+    positions = book_positions(board_size, plies, line_plies, depth)
+    entries = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_search_position, positions.values(), [depth] * len(positions), chunksize=16)
+        for key, (move, score) in zip(positions, results):
+            if move is not None:
+                entries[key] = (move, score, depth)
+    write_book(path, board_size, entries)
+    return len(entries)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a Halma opening book from deep searches.")
+    parser.add_argument('--size', type=int, default=8, help="board size")
+    parser.add_argument('--plies', type=int, default=2, help="plies expanded in full from the start")
+    parser.add_argument('--line-plies', type=int, default=6, help="plies of the engine's own line followed after that")
+    parser.add_argument('--depth', type=int, default=4, help="search depth of each book move")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--out', help="book file (default opening_book_<size>x<size>.bin)")
+    args = parser.parse_args(argv)
+    path = args.out or f'opening_book_{args.size}x{args.size}.bin'
+    count = build_book(path, args.size, args.plies, args.line_plies, args.depth, args.workers)
+    print(f"{count} positions -> {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import argparse
+import random
+import sys
+import engine
+import learn
+from engine import HEURISTIC_VARIANTS, HalmaState
+from learn import LinearEvaluator
+from search import Searcher
+
+# Differential checks of the engine's fast paths against the slow, obvious
+# way of getting the same answer, along random games on every board:
+#
+#   counters - the terms make_move/unmake_move keep by delta (occupancy,
+#              mailbox, distance sums, goal and corner counts, Zobrist key)
+#              and heuristic() of every colour, which reads them, against a
+#              position rebuilt from its masks
+#   wins     - check_for_win's goal counter test, both for the last mover
+#              and on a position without history, against a test of the
+#              goal masks, along racing games that end in a win
+#   batch    - evaluate_children (both the NumPy and the plain Python path)
+#              under every weight set in HEURISTIC_VARIANTS against making
+#              each move and scoring it, and a batched search against one
+#              that visits every leaf
+#   learned  - the same for learn.LinearEvaluator, and its from_weights
+#              form of every weight set against heuristic(), the latter
+#              along the racing games too
+#   parallel - the root-splitting search against the serial one: the same
+#              best move and score at the same depth
+#
+#   python checks.py                                 # everything, quick
+#   python checks.py --checks parallel --depth 3 --workers 4 --games 5
+#
+# Move generation has its own check in perft.py.
+
+CHECKS = ('counters', 'wins', 'batch', 'learned', 'parallel')
+NUMPY_MIN_BATCH = engine.NUMPY_MIN_BATCH
+
+# name -> (board size, topology, players)
+BOARDS = {
+    '8x8': (8, 'square', 2),
+    '10x10': (10, 'square', 2),
+    '16x16-4p': (16, 'square', 4),
+    'star-3p': (4, 'star', 3),
+    'star-6p': (4, 'star', 6),
+}
+
+# Positions along random games: yields the state after every ply, with the
+# side to move switched, then undoes the game so unmake_move is covered too.
+def random_positions(board, games, plies, rng):
+    board_size, topology, players = board
+    for _ in range(games):
+        state = HalmaState(board_size, topology=topology, players=players)
+        for _ in range(plies):
+            yield state
+            moves = state.evaluate_moves(state.which_player)
+            if not moves or state.winner is not None:
+                break
+            state.make_move(rng.choice(moves))
+            state.check_for_win()
+            state.switch_player()
+        while state.history:
+            state.unmake_move()
+            yield state
+
+# Positions along games in which every side mostly plays the move that takes
+# a piece furthest towards its goal, so that, unlike random games, they end
+# in a win; yielded and undone like random_positions.
+def race_positions(board, games, rng, max_plies=2000):
+    board_size, topology, players = board
+    for _ in range(games):
+        state = HalmaState(board_size, topology=topology, players=players)
+        for _ in range(max_plies):
+            yield state
+            player = state.which_player
+            moves = state.evaluate_moves(player)
+            if not moves or state.winner is not None:
+                break
+            if rng.random() < 0.1:
+                move = rng.choice(moves)
+            else:
+                move = max(moves, key=lambda move: (state.goal_distance(move[0], player) - state.goal_distance(move[1], player), rng.random()))
+            state.make_move(move)
+            state.check_for_win()
+            state.switch_player()
+        while state.history:
+            state.unmake_move()
+            yield state
+
+# The first difference between the state's incremental terms and those of
+# the same position rebuilt from scratch, or None.
+def check_counters(state):
+    fresh = HalmaState(state.board_size, state.distance, state.topology, state.players)
+    fresh.set_position(state.masks, state.which_player)
+    for name in ('occupied', 'board', 'distance_sums', 'goal_counts', 'corner_counts', 'key'):
+        if getattr(state, name) != getattr(fresh, name):
+            return f"{name} {getattr(state, name)!r} != rebuilt {getattr(fresh, name)!r}"
+    for color in state.colors:
+        if state.heuristic(color) != fresh.heuristic(color):
+            return f"heuristic({color}) {state.heuristic(color)} != rebuilt {fresh.heuristic(color)}"
+    return None
+
+# check_for_win against the goal masks, on the state (which only looks at
+# the last mover) and on the same position rebuilt without history.
+def check_wins(state):
+    goals = state.tables.goal_masks
+    full = [color for color in state.colors if state.masks[color] & goals[color] == goals[color]]
+    first = full[0] if full else None
+    if state.history:
+        # only the last mover can have just won
+        mover = state.history[-1][0]
+        expected = mover if mover in full else None
+    else:
+        expected = first
+    state.check_for_win()
+    if state.winner != expected:
+        return f"check_for_win says {state.winner}, the goal masks {expected}"
+    fresh = HalmaState.from_snapshot(state.snapshot())
+    fresh.check_for_win()
+    if fresh.winner != first:
+        return f"check_for_win without history says {fresh.winner}, the goal masks {first}"
+    return None
+
+def one_by_one(state, moves, score):
+    scores = []
+    for move in moves:
+        state.make_move(move)
+        scores.append(score(state))
+        state.unmake_move()
+    return scores
+
+def check_batch(state, depth):
+    for mover in state.colors:
+        moves = state.evaluate_moves(mover)
+        if not moves:
+            continue
+        for player in state.colors:
+            expected = {variant: one_by_one(state, moves, lambda s: s.heuristic(player, weights))
+                        for variant, weights in HEURISTIC_VARIANTS.items()}
+            for minimum in (len(moves) + 1, 0): # plain Python, then NumPy where it applies
+                engine.NUMPY_MIN_BATCH = minimum
+                try:
+                    for variant, weights in HEURISTIC_VARIANTS.items():
+                        if state.evaluate_children(moves, player, weights) != expected[variant]:
+                            return f"evaluate_children({mover} moves, {player}) with {variant} weights differs from scoring each child"
+                finally:
+                    engine.NUMPY_MIN_BATCH = NUMPY_MIN_BATCH
+    player = state.which_player
+    for variant, weights in HEURISTIC_VARIANTS.items():
+        batched = Searcher(tt_size=1 << 14, weights=weights).search(state, player, depth)
+        visited = Searcher(tt_size=1 << 14, weights=weights, batch=False).search(state, player, depth)
+        if batched != visited:
+            return f"batched search with {variant} weights gives {batched}, leaf by leaf {visited}"
+    return None
+
+# LinearEvaluator.from_weights gives heuristic()'s scores up to rounding.
+def check_from_weights(state):
+    for player in state.colors:
+        for variant, weights in HEURISTIC_VARIANTS.items():
+            learned = LinearEvaluator.from_weights(weights).evaluate(state, player)
+            heuristic = state.heuristic(player, weights)
+            if abs(learned - heuristic) > 1e-9 * max(1.0, abs(heuristic)):
+                return f"from_weights({variant}) scores {player} {learned}, heuristic() {heuristic}"
+    return None
+
+def check_learned(state, evaluator, depth):
+    problem = check_from_weights(state)
+    if problem is not None:
+        return problem
+    for mover in state.colors:
+        moves = state.evaluate_moves(mover)
+        if not moves:
+            continue
+        for player in state.colors:
+            expected = one_by_one(state, moves, lambda s: evaluator.evaluate(s, player))
+            for minimum in (len(moves) + 1, 0): # plain Python, then NumPy where it applies
+                learn.NUMPY_MIN_BATCH = minimum
+                try:
+                    if evaluator.evaluate_children(state, moves, player) != expected:
+                        return f"LinearEvaluator.evaluate_children({mover} moves, {player}) differs from scoring each child"
+                finally:
+                    learn.NUMPY_MIN_BATCH = NUMPY_MIN_BATCH
+    player = state.which_player
+    batched = Searcher(tt_size=1 << 14, evaluator=evaluator).search(state, player, depth)
+    visited = Searcher(tt_size=1 << 14, evaluator=evaluator, batch=False).search(state, player, depth)
+    if batched != visited:
+        return f"batched search with {evaluator!r} gives {batched}, leaf by leaf {visited}"
+    return None
+
+def check_parallel(state, parallel, depth):
+    player = state.which_player
+    serial = Searcher(tt_size=1 << 16).search(state, player, depth)
+    split = parallel.search(state, player, depth)
+    if serial != split:
+        return f"serial search gives {serial}, parallel {split}"
+    return None
+
+def run(checks, boards, games, plies, depth, workers, every, seed):
+    evaluator = LinearEvaluator((-1.0, 1.5, 40.0, -60.0, 3.0, -2.0, -1.0, 0.5), 0.25)
+    parallel = Searcher(tt_size=1 << 16, workers=workers) if 'parallel' in checks else None
+    # (state, [(check, problem or None), ...]) at every position checked
+    def problems_on(board):
+        if 'wins' in checks or 'learned' in checks:
+            # racing games reach the full goals random games never get near
+            for state in race_positions(board, games, random.Random(seed)):
+                problems = []
+                if 'wins' in checks:
+                    problems.append(('wins', check_wins(state)))
+                if 'learned' in checks:
+                    problems.append(('learned', check_from_weights(state)))
+                yield state, problems
+        rng = random.Random(seed)
+        for index, state in enumerate(random_positions(board, games, plies, rng)):
+            problems = []
+            if 'counters' in checks:
+                problems.append(('counters', check_counters(state)))
+            if index % every == 0 and not state.check_for_win():
+                if 'batch' in checks:
+                    problems.append(('batch', check_batch(state, depth)))
+                if 'learned' in checks:
+                    problems.append(('learned', check_learned(state, evaluator, depth)))
+                if 'parallel' in checks:
+                    problems.append(('parallel', check_parallel(state, parallel, depth)))
+            yield state, problems
+    try:
+        for name in boards:
+            counts = dict.fromkeys(checks, 0)
+            for state, problems in problems_on(BOARDS[name]):
+                for check, problem in problems:
+                    counts[check] += 1
+                    if problem is not None:
+                        print(f"MISMATCH {check} on {name} at {state.snapshot()}: {problem}")
+                        return 1
+            print(f"{name}: " + ', '.join(f"{check} ok over {count} positions" for check, count in counts.items()))
+    finally:
+        if parallel is not None:
+            parallel.close()
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the engine's fast paths against slow references.")
+    parser.add_argument('--checks', nargs='+', default=list(CHECKS), choices=CHECKS, help="checks to run")
+    parser.add_argument('--boards', nargs='+', default=list(BOARDS), choices=list(BOARDS), help="boards to play on")
+    parser.add_argument('--games', type=int, default=2, help="random (and racing) games per board")
+    parser.add_argument('--plies', type=int, default=60, help="plies per random game")
+    parser.add_argument('--depth', type=int, default=2, help="depth of the compared searches")
+    parser.add_argument('--workers', type=int, default=2, help="worker processes of the parallel search")
+    parser.add_argument('--every', type=int, default=10, help="run the search checks on every n-th position")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the random games")
+    args = parser.parse_args(argv)
+    if 'parallel' in args.checks and args.workers < 2:
+        parser.error("the parallel check needs at least 2 workers to split the root")
+    return run(args.checks, args.boards, args.games, args.plies, args.depth, args.workers, args.every, args.seed)
+
+if __name__ == "__main__":
+    sys.exit(main())
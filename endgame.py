@@ -0,0 +1,141 @@
+from engine import iter_bits
+
+# Endgame race solver. Once every piece of a side is within `radius` squares
+# of its goal and no opposing piece sits in that goal, the game is a race:
+# the side wins by filling its goal in as few moves as it can, and the
+# opponent's pieces are just obstacles. The solver finds that minimum with
+# IDA*, so the AI stops shuffling pieces in front of the goal and does not
+# spend its search budget on a position it can solve exactly.
+#
+# The lower bound is the number of pieces still outside the goal, since
+# every move brings at most one piece in. Three caches outlive a single
+# solve: lower bounds learned from failed iterations, the optimal line of
+# every solved position (a suffix of an optimal line is optimal too) and
+# the positions that ran out of nodes, which are not tried again. They are
+# keyed by position and side, so one solver can serve both colours.
+#
+# solve() also takes a should_stop callable, looked at every CHECK_INTERVAL
+# nodes, so a caller's deadline or stop request cuts a solve short. Such a
+# solve is not remembered as failed; with more time it may still finish.
+
+class EndgameLimit(Exception):
+    pass
+
+class EndgameTimeout(EndgameLimit):
+    pass
+
+class EndgameSolver:
+    CHECK_INTERVAL = 1024
+    def __init__(self, radius=2, node_limit=200000, cache_size=1 << 20):
+        self.radius = radius
+        self.node_limit = node_limit
+        self.cache_size = cache_size
+        self.solved = {} # position key -> (moves to fill the goal, best move)
+        self.bounds = {} # position key -> lower bound on moves to fill the goal
+        self.failed = set() # position keys that ran out of nodes
+        self.nodes = 0
+        self.next_check = self.CHECK_INTERVAL
+        self.should_stop = None
+    # the cache key: the same squares solved for the other side differ
+    def position_key(self, state, player):
+        return state.key ^ state.tables.side_keys[player]
+    def is_endgame(self, state, player):
+        if state.occupied & ~state.masks[player] & state.tables.goal_masks[player]:
+            return False
+        distance = state.tables.distances('euclidean')[player]
+        limit = self.radius * self.radius
+        return all(distance[sq] <= limit for sq in iter_bits(state.masks[player]))
+    # (best move, moves needed to fill the goal) or None when the position
+    # is not a race, the node limit ran out first or should_stop() said so.
+    def solve(self, state, player, should_stop=None):
+        self.nodes = 0
+        self.next_check = self.CHECK_INTERVAL
+        self.should_stop = should_stop
+        if not self.is_endgame(state, player):
+            return None
+        root = self.position_key(state, player)
+        entry = self.solved.get(root)
+        if entry is not None:
+            return entry[1], entry[0]
+        if root in self.failed:
+            return None
+        if len(self.solved) + len(self.bounds) + len(self.failed) > self.cache_size:
+            self.solved.clear()
+            self.bounds.clear()
+            self.failed.clear()
+        base = len(state.history)
+        bound = self.lower_bound(state, player)
+        try:
+            while True:
+                path = self.dfs(state, player, 0, bound)
+                if isinstance(path, list):
+                    break
+                if path == float('inf'):
+                    return None
+                bound = path
+        except EndgameLimit as limit:
+            while len(state.history) > base:
+                state.unmake_move()
+            if not isinstance(limit, EndgameTimeout):
+                self.failed.add(root)
+            return None
+        if not path:
+            return None
+        # remember the whole line; every position on it is solved too
+        keys = []
+        for move in path:
+            keys.append(self.position_key(state, player))
+            state.make_move(move)
+        for move in path:
+            state.unmake_move()
+        for index, (key, move) in enumerate(zip(keys, path)):
+            self.solved[key] = (len(path) - index, move)
+        return path[0], len(path)
+    def lower_bound(self, state, player):
+        return state.tables.goal_sizes[player] - state.goal_counts[player]
+    # Returns the moves that fill the goal within bound - g more moves, or
+    # the smallest f that went over the bound.
+    def dfs(self, state, player, g, bound):
+        self.nodes += 1
+        if self.nodes > self.node_limit:
+            raise EndgameLimit()
+        if self.nodes >= self.next_check:
+            self.next_check = self.nodes + self.CHECK_INTERVAL
+            if self.should_stop is not None and self.should_stop():
+                raise EndgameTimeout()
+        h = self.lower_bound(state, player)
+        if h == 0:
+            return []
+        key = self.position_key(state, player)
+        entry = self.solved.get(key)
+        if entry is not None:
+            moves_left, move = entry
+            if g + moves_left > bound:
+                return g + moves_left
+            # follow the known optimal line
+            state.make_move(move)
+            rest = self.dfs(state, player, g + 1, bound)
+            state.unmake_move()
+            if isinstance(rest, list):
+                return [move] + rest
+        f = g + max(h, self.bounds.get(key, 0))
+        if f > bound:
+            return f
+        # squared distances to the nearest goal square
+        distance = state.tables.distances('euclidean')[player]
+        limit = self.radius * self.radius
+        # pieces into the goal first, then the ones that gain the most
+        moves = sorted(state.evaluate_moves(player), key=lambda move: distance[move[1]] - distance[move[0]])
+        next_bound = float('inf')
+        for move in moves:
+            if distance[move[1]] > limit:
+                continue # stay inside the race region
+            state.make_move(move)
+            result = self.dfs(state, player, g + 1, bound)
+            state.unmake_move()
+            if isinstance(result, list):
+                return [move] + result
+            next_bound = min(next_bound, result)
+        if next_bound != float('inf'):
+            self.bounds[key] = next_bound - g
+        return next_bound
@@ -0,0 +1,547 @@
+# Headless Halma rules and search. Nothing in here touches tkinter, so the
+# same state can be driven by the HalmaBoard canvas or by scripts that play
+# thousands of games without a display.
+#
+# Positions are bitboards: square (row, col) is bit row * columns + col, each
+# colour has one integer mask and `occupied` is their union. Next to them a
+# bytearray mailbox, one byte per square, holds 1 + the seat of the piece on
+# it (0 when empty), so finding the piece on a square never scans.
+# Neighbour and jump-landing squares only depend on the board, so they are
+# built once per board and shared by every state of that board.
+#
+# Boards come from TOPOLOGIES (which cells exist, the directions pieces move
+# along and where the camps are) and SEATINGS (which camps N players start
+# in). The classic game is the two-player square board; 16x16 also seats
+# four players and the Chinese-checkers star two, three, four or six.
+#
+# make_move/unmake_move keep the evaluation terms (distance sums, corner and
+# goal counts) and the Zobrist key up to date by delta, so heuristic() is O(1)
+# at a leaf. The search itself lives in search.py.
+#
+# Goal distances come from per-size tables as well: 'euclidean' is the
+# squared distance to the nearest goal square, 'moves' the fewest steps or
+# single jumps needed to get there (breadth-first over the move graph).
+# save_distance_tables/load_distance_tables keep them on disk.
+import json
+import math
+import random
+try:
+    import numpy as np
+except ImportError: # batch evaluation falls back to plain Python
+    np = None
+
+# the two-player colours; boards with more players add to them
+COLORS = ('green', 'red')
+DISTANCE_METRICS = ('euclidean', 'moves')
+# below this many siblings NumPy's per-call overhead costs more than it saves
+NUMPY_MIN_BATCH = 48
+# same order the original move generator walked the neighbours in
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+# the six neighbours of a hole on the star board, whose (row, col) are
+# axial hex coordinates
+HEX_DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0), (-1, 1), (1, -1)]
+
+# Weights of the three heuristic terms: distance to goal, pieces on the far
+# corner square and pieces blocking an unfilled goal. 'default' is the
+# original hand-tuned heuristic; the others exist to be compared against it.
+HEURISTIC_VARIANTS = {
+    'default': {'distance': 1, 'corner_bonus': 50, 'blocking': 1},
+    'no_blocking': {'distance': 1, 'corner_bonus': 50, 'blocking': 0},
+    'distance_only': {'distance': 1, 'corner_bonus': 0, 'blocking': 0},
+    'strict_blocking': {'distance': 1, 'corner_bonus': 50, 'blocking': 5},
+}
+DEFAULT_WEIGHTS = HEURISTIC_VARIANTS['default']
+
+def opponent(player):
+    return 'red' if player == 'green' else 'green'
+
+def iter_bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+# Square board: every cell exists and the camps are the corner triangles of
+# (size + 1) // 2 rows, counted clockwise from the top left. Returns the
+# grid size, the cells, the camps and the far corner cell of each camp.
+def square_board(board_size):
+    rows = columns = board_size
+    corner_size = (board_size + 1) // 2
+    cells = [(row, col) for row in range(rows) for col in range(columns)]
+    camps = [[], [], [], []]
+    for row, col in cells:
+        if row + col < corner_size:
+            camps[0].append((row, col))
+        if row + (columns - 1 - col) < corner_size:
+            camps[1].append((row, col))
+        if (rows - 1 - row) + (columns - 1 - col) < corner_size:
+            camps[2].append((row, col))
+        if (rows - 1 - row) + col < corner_size:
+            camps[3].append((row, col))
+    tips = [(0, 0), (0, columns - 1), (rows - 1, columns - 1), (rows - 1, 0)]
+    return rows, columns, cells, camps, tips
+
+# Chinese-checkers star: two overlapping triangles of holes, board_size holes
+# along the edge of each point (4 is the classic 121-hole board). Holes sit
+# on a (4 * size + 1)-square grid of axial coordinates centred on the middle
+# hole; the camps are the six points, counted clockwise from the top.
+def star_board(board_size):
+    n = board_size
+    rows = columns = 4 * n + 1
+    cells = []
+    points = {}
+    for row in range(rows):
+        for col in range(columns):
+            q, r = col - 2 * n, row - 2 * n
+            s = -q - r
+            if min(q, r, s) >= -n or max(q, r, s) <= n:
+                cells.append((row, col))
+                # outside the middle hexagon is one of the points
+                for axis, value in enumerate((q, r, s)):
+                    if abs(value) > n:
+                        points.setdefault((axis, value > 0), []).append((row, col))
+    def angle(camp):
+        q = sum(col for _, col in camp) / len(camp) - 2 * n
+        r = sum(row for row, _ in camp) / len(camp) - 2 * n
+        return math.atan2(q + r / 2, -r) % (2 * math.pi)
+    camps = sorted(points.values(), key=angle)
+    tips = [max(camp, key=lambda cell: hex_distance(cell[0] - 2 * n, cell[1] - 2 * n)) for camp in camps]
+    return rows, columns, cells, camps, tips
+
+def hex_distance(dr, dc):
+    return (abs(dr) + abs(dc) + abs(dr + dc)) // 2
+
+# board: builds the cells and camps, directions: the lines pieces step and
+# jump along, distance: squared distance between two cells (dr, dc) apart,
+# for the 'euclidean' goal distance
+TOPOLOGIES = {
+    'square': {'board': square_board, 'directions': DIRECTIONS, 'distance': lambda dr, dc: dr * dr + dc * dc},
+    'star': {'board': star_board, 'directions': HEX_DIRECTIONS, 'distance': lambda dr, dc: hex_distance(dr, dc) ** 2},
+}
+# (colour, starting camp) per player in turn order; everyone aims for the
+# camp across the board
+SEATINGS = {
+    ('square', 2): (('green', 0), ('red', 2)),
+    ('square', 4): (('green', 0), ('blue', 1), ('red', 2), ('yellow', 3)),
+    ('star', 2): (('green', 0), ('red', 3)),
+    ('star', 3): (('green', 0), ('blue', 2), ('yellow', 4)),
+    ('star', 4): (('green', 0), ('blue', 1), ('red', 3), ('yellow', 4)),
+    ('star', 6): (('green', 0), ('blue', 1), ('purple', 2), ('red', 3), ('yellow', 4), ('orange', 5)),
+}
+
+class BoardTables:
+    def __init__(self, board_size, topology='square', players=2):
+        if (topology, players) not in SEATINGS:
+            raise ValueError(f"no {players}-player layout for the {topology} board")
+        layout = TOPOLOGIES[topology]
+        rows, columns, cells, camps, tips = layout['board'](board_size)
+        self.topology = topology
+        self.rows = rows
+        self.columns = columns
+        self.size = rows * columns
+        self.cell_distance = layout['distance']
+        # the classic board keeps its old name, so saved tables still load
+        self.name = f"{rows}x{columns}" if (topology, players) == ('square', 2) else f"{topology}{board_size}-{players}p"
+        cell_mask = 0
+        for row, col in cells:
+            cell_mask |= 1 << (row * columns + col)
+        self.cell_mask = cell_mask
+        # links[sq] holds (adjacent square, landing square or -1) per direction
+        self.links = []
+        for sq in range(self.size):
+            row, col = divmod(sq, columns)
+            links = []
+            for dr, dc in layout['directions']:
+                if not cell_mask >> sq & 1:
+                    break
+                r, c = row + dr, col + dc
+                if r < 0 or r >= rows or c < 0 or c >= columns or not cell_mask >> (r * columns + c) & 1:
+                    continue
+                jr, jc = r + dr, c + dc
+                if jr < 0 or jr >= rows or jc < 0 or jc >= columns or not cell_mask >> (jr * columns + jc) & 1:
+                    land = -1
+                else:
+                    land = jr * columns + jc
+                links.append((r * columns + c, land))
+            self.links.append(tuple(links))
+        # each side starts in a camp and wins by filling the one across
+        seating = SEATINGS[(topology, players)]
+        self.colors = tuple(color for color, _ in seating)
+        self.next_player = {color: self.colors[(i + 1) % players] for i, color in enumerate(self.colors)}
+        def camp_mask(camp):
+            return sum(1 << (row * columns + col) for row, col in camps[camp])
+        self.start_masks = {color: camp_mask(camp) for color, camp in seating}
+        across = {color: (camp + len(camps) // 2) % len(camps) for color, camp in seating}
+        # a square shared by two camps would hold two pieces at the start
+        taken = 0
+        for camp in sorted({camp for _, camp in seating} | set(across.values())):
+            if taken & camp_mask(camp):
+                raise ValueError(f"the camps of the {players}-player {topology} board of size {board_size} overlap")
+            taken |= camp_mask(camp)
+        self.goal_masks = {color: camp_mask(across[color]) for color in self.colors}
+        self.goal_sizes = {color: mask.bit_count() for color, mask in self.goal_masks.items()}
+        self.goal_squares = {color: [divmod(sq, columns) for sq in iter_bits(mask)] for color, mask in self.goal_masks.items()}
+        self.corner_squares = {color: tips[across[color]][0] * columns + tips[across[color]][1] for color in self.colors}
+        # Zobrist keys; seeded by board so every process agrees on them
+        rng = random.Random(f"halma-{self.name}")
+        self.zobrist = {color: [rng.getrandbits(64) for _ in range(self.size)] for color in self.colors}
+        self.side_keys = {color: rng.getrandbits(64) for color in self.colors}
+        self.perspective_keys = {color: rng.getrandbits(64) for color in self.colors}
+        self.distance_tables = {}
+        self.array_tables = {}
+    # NumPy copies of the per-square tables used by evaluate_children
+    def arrays(self, metric):
+        arrays = self.array_tables.get(metric)
+        if arrays is None:
+            distances = self.distances(metric)
+            arrays = self.array_tables[metric] = {}
+            for color in self.colors:
+                goal = self.goal_masks[color]
+                corner = np.zeros(self.size, dtype=np.int64)
+                corner[self.corner_squares[color]] = 1
+                arrays[color] = (
+                    np.array(distances[color], dtype=np.int64),
+                    np.array([goal >> sq & 1 for sq in range(self.size)], dtype=np.int64),
+                    corner,
+                )
+        return arrays
+    def distances(self, metric):
+        table = self.distance_tables.get(metric)
+        if table is None:
+            table = _loaded_distances.get(f"{self.name}/{metric}")
+            if table is None:
+                table = self.build_distances(metric)
+            self.distance_tables[metric] = table
+        return table
+    def build_distances(self, metric):
+        if metric not in DISTANCE_METRICS:
+            raise ValueError(f"unknown distance metric {metric!r}")
+        table = {}
+        for color in self.colors:
+            if metric == 'euclidean':
+                goals = self.goal_squares[color]
+                cell_distance = self.cell_distance
+                table[color] = [min(cell_distance(sq // self.columns - r, sq % self.columns - c) for r, c in goals) for sq in range(self.size)]
+                continue
+            distance = [-1] * self.size
+            frontier = list(iter_bits(self.goal_masks[color]))
+            for sq in frontier:
+                distance[sq] = 0
+            while frontier:
+                next_frontier = []
+                for sq in frontier:
+                    for adj, land in self.links[sq]:
+                        for target in (adj, land):
+                            if target >= 0 and distance[target] < 0:
+                                distance[target] = distance[sq] + 1
+                                next_frontier.append(target)
+                frontier = next_frontier
+            table[color] = distance
+        return table
+
+_tables = {}
+_loaded_distances = {}
+
+def get_tables(board_size, topology='square', players=2):
+    tables = _tables.get((board_size, topology, players))
+    if tables is None:
+        tables = _tables[(board_size, topology, players)] = BoardTables(board_size, topology, players)
+    return tables
+
+def save_distance_tables(path, board_sizes, metrics=DISTANCE_METRICS):
+    data = {}
+    for board_size in board_sizes:
+        tables = get_tables(board_size)
+        for metric in metrics:
+            data[f"{tables.name}/{metric}"] = tables.distances(metric)
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+# Tables loaded here are used instead of building them, including by boards
+# whose tables already exist.
+def load_distance_tables(path):
+    with open(path) as f:
+        data = json.load(f)
+    _loaded_distances.update(data)
+    for tables in _tables.values():
+        for metric in DISTANCE_METRICS:
+            if f"{tables.name}/{metric}" in data:
+                tables.distance_tables[metric] = data[f"{tables.name}/{metric}"]
+
+# Every square the piece on sq can move to, each listed once. Steps go to
+# an empty neighbour; jumps go over an occupied neighbour to the empty square
+# behind it and may chain. Each landing square expands at most once, so
+# cyclic chains terminate, and a square reached by several chains (or by a
+# step and a chain) is still a single move.
+def destinations(sq, occupied, links):
+    legal_moves = []
+    listed = 0
+    landed = occupied # landed on already, or taken
+    stack = []
+    for adj, land in links[sq]:
+        if occupied >> adj & 1:
+            if land >= 0 and not landed >> land & 1:
+                landed |= 1 << land
+                listed |= 1 << land
+                stack.append(land)
+                legal_moves.append(land)
+        else:
+            listed |= 1 << adj
+            legal_moves.append(adj)
+    while stack:
+        current = stack.pop()
+        for adj, land in links[current]:
+            if land >= 0 and occupied >> adj & 1 and not landed >> land & 1:
+                landed |= 1 << land
+                stack.append(land)
+                if not listed >> land & 1:
+                    listed |= 1 << land
+                    legal_moves.append(land)
+    return legal_moves
+
+class HalmaState:
+    def __init__(self, board_size, distance='euclidean', topology='square', players=2):
+        self.board_size = board_size
+        self.topology = topology
+        self.players = players
+        self.tables = get_tables(board_size, topology, players)
+        self.rows = self.tables.rows
+        self.columns = self.tables.columns
+        self.colors = self.tables.colors
+        self.goal_sizes = self.tables.goal_sizes
+        self.distance = distance
+        self.goal_dist = self.tables.distances(distance)
+        self.reset()
+    def reset(self):
+        self.set_position(self.tables.start_masks, self.colors[0])
+    # Compact, picklable form of the position: the board, one mask per
+    # colour, the side to move and the distance metric.
+    def snapshot(self):
+        masks = tuple(self.masks[color] for color in self.colors)
+        return (self.board_size, self.topology, self.players, masks, self.which_player, self.distance)
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        board_size, topology, players, masks, which_player, distance = snapshot
+        state = cls(board_size, distance, topology, players)
+        state.set_position(dict(zip(state.colors, masks)), which_player)
+        return state
+    def set_position(self, masks, which_player):
+        self.masks = dict(masks)
+        self.occupied = 0
+        self.board = bytearray(self.tables.size)
+        for index, color in enumerate(self.colors):
+            self.occupied |= self.masks[color]
+            for sq in iter_bits(self.masks[color]):
+                self.board[sq] = index + 1
+        self.which_player = which_player
+        self.winner = None
+        self.history = [] # (color, from, to) for every move made, for unmake_move
+        goals = self.tables.goal_masks
+        corners = self.tables.corner_squares
+        self.piece_counts = {color: self.masks[color].bit_count() for color in self.colors}
+        self.distance_sums = {color: sum(self.goal_distance(sq, color) for sq in iter_bits(self.masks[color])) for color in self.colors}
+        self.goal_counts = {color: (self.masks[color] & goals[color]).bit_count() for color in self.colors}
+        self.corner_counts = {color: self.masks[color] >> corners[color] & 1 for color in self.colors}
+        self.key = 0
+        for color in self.colors:
+            for sq in iter_bits(self.masks[color]):
+                self.key ^= self.tables.zobrist[color][sq]
+    def square(self, position):
+        row, col = position
+        return row * self.columns + col
+    def position(self, sq):
+        return divmod(sq, self.columns)
+    def color_at(self, position):
+        return self.piece_at(self.square(position))
+    def piece_at(self, sq):
+        index = self.board[sq]
+        return self.colors[index - 1] if index else None
+    def iter_pieces(self):
+        for color in self.colors:
+            for sq in iter_bits(self.masks[color]):
+                yield self.position(sq), color
+    def next_player(self, player):
+        return self.tables.next_player[player]
+    def switch_player(self):
+        self.which_player = self.tables.next_player[self.which_player]
+    def move_piece(self, from_position, to_position):
+        self.make_move((self.square(from_position), self.square(to_position)))
+    # Turn order is left to the caller: make_move only moves the piece.
+    def make_move(self, move):
+        frm, to = move
+        color = self.colors[self.board[frm] - 1]
+        self.shift(color, frm, to)
+        self.history.append((color, frm, to))
+    def unmake_move(self):
+        color, frm, to = self.history.pop()
+        self.shift(color, to, frm)
+    def shift(self, color, frm, to):
+        change = (1 << frm) | (1 << to)
+        self.masks[color] ^= change
+        self.occupied ^= change
+        board = self.board
+        board[to] = board[frm]
+        board[frm] = 0
+        keys = self.tables.zobrist[color]
+        self.key ^= keys[frm] ^ keys[to]
+        distance = self.goal_dist[color]
+        self.distance_sums[color] += distance[to] - distance[frm]
+        goal = self.tables.goal_masks[color]
+        self.goal_counts[color] += (goal >> to & 1) - (goal >> frm & 1)
+        corner = self.tables.corner_squares[color]
+        self.corner_counts[color] += (to == corner) - (frm == corner)
+    def get_legal_moves(self, position):
+        return [self.position(sq) for sq in self.legal_squares(self.square(position))]
+    def legal_squares(self, sq):
+        return destinations(sq, self.occupied, self.tables.links)
+    # All moves of one colour. Occupancy and the link table are looked up
+    # once for the whole colour, not once per piece.
+    def evaluate_moves(self, player):
+        occupied = self.occupied
+        links = self.tables.links
+        moves = []
+        for sq in iter_bits(self.masks[player]):
+            for to in destinations(sq, occupied, links):
+                moves.append((sq, to))
+        return moves
+    # {destination: [sq, ..., destination]} with the fewest hops to every
+    # destination, so the UI can draw a jump chain square by square.
+    def legal_paths(self, sq):
+        occupied = self.occupied
+        links = self.tables.links
+        paths = {}
+        for adj, land in links[sq]:
+            if not occupied >> adj & 1:
+                paths[adj] = [sq, adj]
+        landed = occupied
+        frontier = [[sq]]
+        while frontier:
+            next_frontier = []
+            for path in frontier:
+                for adj, land in links[path[-1]]:
+                    if land >= 0 and occupied >> adj & 1 and not landed >> land & 1:
+                        landed |= 1 << land
+                        chain = path + [land]
+                        next_frontier.append(chain)
+                        paths.setdefault(land, chain)
+            frontier = next_frontier
+        return paths
+    def get_legal_paths(self, position):
+        return {self.position(to): [self.position(sq) for sq in path] for to, path in self.legal_paths(self.square(position)).items()}
+    # A goal is full when its piece counter reaches the goal's size. Moves
+    # only change the mover's counter and a game ends at its first win, so
+    # after a move this is a single comparison; only a position without
+    # moves (fresh from set_position) looks at every colour.
+    def check_for_win(self):
+        if self.history:
+            color = self.history[-1][0]
+            self.winner = color if self.goal_counts[color] == self.goal_sizes[color] else None
+            return self.winner is not None
+        self.winner = None
+        for color in self.colors:
+            if self.goal_counts[color] == self.goal_sizes[color]:
+                self.winner = color
+                break
+        return self.winner is not None
+    def goal_distance(self, sq, player):
+        return self.goal_dist[player][sq]
+    # The score of the position for player, whoever is to move: the search
+    # scores every leaf for its ai_player (the original game scored leaves
+    # for the side to move there). Each side's corner bonus counts its own
+    # pieces on the far corner of its own goal (the original counted both
+    # sides on the player's goal corner, where the opponent never goes).
+    def heuristic(self, player, weights=DEFAULT_WEIGHTS):
+        if self.players > 2:
+            return self.multi_score(player, self.distance_sums, self.corner_counts, self.goal_counts[player], weights)
+        other = opponent(player)
+        # Average squared distance between each piece and its nearest target cell
+        player_distance = self.distance_sums[player] / self.piece_counts[player]
+        opponent_distance = self.distance_sums[other] / self.piece_counts[other]
+        # Add a bonus for each piece that has reached the opposite corner
+        player_bonus = self.corner_counts[player]
+        opponent_bonus = self.corner_counts[other]
+        # Pieces sitting in an unfilled goal block the ones still on their way in
+        blocking_penalty = 0
+        if self.goal_counts[player] < self.tables.goal_sizes[player]:
+            blocking_penalty = self.goal_counts[player]
+        score = (opponent_distance - player_distance) * weights['distance'] + (player_bonus - opponent_bonus) * weights['corner_bonus'] - blocking_penalty * weights['blocking']
+        return score
+    # The heuristic with more than two players: each player is measured
+    # against the average of the others. Takes the terms as arguments so
+    # evaluate_children can score a child without making its move.
+    def multi_score(self, player, sums, corners, goal_count, weights):
+        counts = self.piece_counts
+        others_distance = 0.0
+        others_bonus = 0
+        for color in self.colors:
+            if color != player:
+                others_distance += sums[color] / counts[color]
+                others_bonus += corners[color]
+        others = self.players - 1
+        blocking_penalty = goal_count if goal_count < self.tables.goal_sizes[player] else 0
+        return (others_distance / others - sums[player] / counts[player]) * weights['distance'] + (corners[player] - others_bonus / others) * weights['corner_bonus'] - blocking_penalty * weights['blocking']
+    # heuristic() of every player at once, for max-n search
+    def scores(self, weights=DEFAULT_WEIGHTS):
+        return {color: self.heuristic(color, weights) for color in self.colors}
+    # heuristic(player) of the position after each of `moves`, all made by
+    # the same colour, without making them: every child differs from this
+    # position only by the moved piece's distance, goal and corner terms.
+    # Large batches go through NumPy in one vectorized pass when it is
+    # installed; the result is a list either way.
+    def evaluate_children(self, moves, player, weights=DEFAULT_WEIGHTS):
+        if self.players > 2:
+            return self.evaluate_children_multi(moves, player, weights)
+        other = opponent(player)
+        mover = self.colors[self.board[moves[0][0]] - 1]
+        goal_size = self.tables.goal_sizes[player]
+        wd, wc, wb = weights['distance'], weights['corner_bonus'], weights['blocking']
+        sums = dict(self.distance_sums)
+        corners = dict(self.corner_counts)
+        goal_count = self.goal_counts[player]
+        if np is not None and len(moves) >= NUMPY_MIN_BATCH:
+            distance, in_goal, on_corner = self.tables.arrays(self.distance)[mover]
+            squares = np.array(moves, dtype=np.int64)
+            frm, to = squares[:, 0], squares[:, 1]
+            mover_sums = sums[mover] + distance[to] - distance[frm]
+            mover_corners = corners[mover] + on_corner[to] - on_corner[frm]
+            if mover == player:
+                player_distance = mover_sums / self.piece_counts[player]
+                opponent_distance = sums[other] / self.piece_counts[other]
+                bonus = mover_corners - corners[other]
+                goal_counts = goal_count + in_goal[to] - in_goal[frm]
+                blocking_penalty = np.where(goal_counts < goal_size, goal_counts, 0)
+            else:
+                player_distance = sums[player] / self.piece_counts[player]
+                opponent_distance = mover_sums / self.piece_counts[other]
+                bonus = corners[player] - mover_corners
+                blocking_penalty = goal_count if goal_count < goal_size else 0
+            scores = (opponent_distance - player_distance) * wd + bonus * wc - blocking_penalty * wb
+            return scores.tolist()
+        distance = self.goal_dist[mover]
+        goal = self.tables.goal_masks[mover]
+        corner = self.tables.corner_squares[mover]
+        scores = []
+        for frm, to in moves:
+            sums[mover] = self.distance_sums[mover] + distance[to] - distance[frm]
+            corners[mover] = self.corner_counts[mover] + (to == corner) - (frm == corner)
+            if mover == player:
+                goal_count = self.goal_counts[player] + (goal >> to & 1) - (goal >> frm & 1)
+            blocking_penalty = goal_count if goal_count < goal_size else 0
+            scores.append((sums[other] / self.piece_counts[other] - sums[player] / self.piece_counts[player]) * wd + (corners[player] - corners[other]) * wc - blocking_penalty * wb)
+        return scores
+    def evaluate_children_multi(self, moves, player, weights):
+        mover = self.colors[self.board[moves[0][0]] - 1]
+        sums = dict(self.distance_sums)
+        corners = dict(self.corner_counts)
+        goal_count = self.goal_counts[player]
+        distance = self.goal_dist[mover]
+        goal = self.tables.goal_masks[mover]
+        corner = self.tables.corner_squares[mover]
+        scores = []
+        for frm, to in moves:
+            sums[mover] = self.distance_sums[mover] + distance[to] - distance[frm]
+            corners[mover] = self.corner_counts[mover] + (to == corner) - (frm == corner)
+            if mover == player:
+                goal_count = self.goal_counts[player] + (goal >> to & 1) - (goal >> frm & 1)
+            scores.append(self.multi_score(player, sums, corners, goal_count, weights))
+        return scores
@@ -0,0 +1,282 @@
+import argparse
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from engine import DEFAULT_WEIGHTS, DISTANCE_METRICS, NUMPY_MIN_BATCH, HalmaState
+from search import Searcher
+try:
+    import numpy as np
+except ImportError: # fitting and batch scoring fall back to plain Python
+    np = None
+
+# A learned evaluation: a linear function of the terms the engine already
+# keeps by delta (distance sums, corner and goal counts), fitted to the
+# scores of deeper searches in self-play games instead of hand-tuning the
+# weights in engine.HEURISTIC_VARIANTS:
+#
+#   python learn.py --size 8 --games 200 --depth 2 --out eval_8x8.json
+#   python tournament.py --variants default learned --evaluator eval_8x8.json
+#
+# Every position a player searched in the self-play games becomes one
+# training row per colour: the colour's terms against those of the others,
+# labelled with the search score from that colour's side (optionally mixed
+# with the game's result). Positions after a random move are played but not
+# labelled. The last --holdout share of games is kept out of the fit and
+# used to report the error of the fitted model and of the hand-tuned
+# heuristic on the same labels.
+#
+# Scoring reads the same O(1) terms as HalmaState.heuristic, so a leaf costs
+# one dot product, and evaluate_children scores all children of a node
+# without making their moves (through NumPy for large two-player batches).
+
+# the mover's terms and the average of the other players' ones
+FEATURES = ('distance', 'others_distance', 'corner', 'others_corner', 'goal', 'others_goal', 'blocking', 'others_blocking')
+# label of a won game, for mixing results into the search scores
+OUTCOME_SCORE = 100.0
+
+# The features of player in a position with the given terms (dicts by
+# colour, as HalmaState keeps them), so children can be scored without
+# making their moves. Goals count as the filled share of the goal, blocking
+# as the pieces in a goal that is not full yet.
+def position_terms(state, player, sums, corners, goals):
+    counts = state.piece_counts
+    sizes = state.goal_sizes
+    distance = 0.0
+    corner = 0
+    goal = 0.0
+    blocking = 0
+    for color in state.colors:
+        if color != player:
+            distance += sums[color] / counts[color]
+            corner += corners[color]
+            goal += goals[color] / sizes[color]
+            if goals[color] < sizes[color]:
+                blocking += goals[color]
+    others = state.players - 1
+    own = goals[player]
+    return (sums[player] / counts[player], distance / others, corners[player], corner / others,
+            own / sizes[player], goal / others, own if own < sizes[player] else 0, blocking / others)
+
+class LinearEvaluator:
+    # board and distance name what the weights were fitted on (a
+    # BoardTables name and a distance metric); matches() checks them.
+    def __init__(self, weights, bias=0.0, board=None, distance='euclidean'):
+        if len(weights) != len(FEATURES):
+            raise ValueError(f"expected {len(FEATURES)} weights, got {len(weights)}")
+        self.weights = tuple(float(weight) for weight in weights)
+        self.bias = float(bias)
+        self.board = board
+        self.distance = distance
+    # the repr keys the worker processes' searchers (see search.py)
+    def __repr__(self):
+        return f"LinearEvaluator({self.weights!r}, {self.bias!r}, {self.board!r}, {self.distance!r})"
+    # The hand-tuned heuristic with these engine weights as a linear model:
+    # the same scores up to rounding, for comparing speed and fits.
+    @classmethod
+    def from_weights(cls, weights=DEFAULT_WEIGHTS):
+        wd, wc, wb = weights['distance'], weights['corner_bonus'], weights['blocking']
+        return cls((-wd, wd, wc, -wc, 0, 0, -wb, 0))
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('features') != list(FEATURES):
+            raise ValueError(f"{path} does not hold weights for the features {FEATURES}")
+        return cls(data['weights'], data['bias'], data.get('board'), data.get('distance', 'euclidean'))
+    def save(self, path, **info):
+        with open(path, 'w') as f:
+            json.dump(dict(info, features=list(FEATURES), weights=self.weights, bias=self.bias,
+                           board=self.board, distance=self.distance), f, indent=2)
+    def matches(self, state):
+        return (self.board is None or self.board == state.tables.name) and self.distance == state.distance
+    # Works on scalars and on NumPy arrays alike, adding the terms up in the
+    # same order, so a batch gives exactly the scores of one-by-one calls.
+    def dot(self, terms):
+        score = self.bias
+        for weight, term in zip(self.weights, terms):
+            score = score + weight * term
+        return score
+    def evaluate(self, state, player):
+        return self.dot(position_terms(state, player, state.distance_sums, state.corner_counts, state.goal_counts))
+    # evaluate() of every player at once, for max-n search
+    def scores(self, state):
+        return {color: self.evaluate(state, color) for color in state.colors}
+    # evaluate(player) of the position after each of `moves`, all made by
+    # the same colour, as HalmaState.evaluate_children does for heuristic().
+    def evaluate_children(self, state, moves, player):
+        mover = state.colors[state.board[moves[0][0]] - 1]
+        if np is not None and state.players == 2 and len(moves) >= NUMPY_MIN_BATCH:
+            return self.evaluate_children_numpy(state, moves, player, mover)
+        sums = dict(state.distance_sums)
+        corners = dict(state.corner_counts)
+        goals = dict(state.goal_counts)
+        distance = state.goal_dist[mover]
+        goal = state.tables.goal_masks[mover]
+        corner = state.tables.corner_squares[mover]
+        scores = []
+        for frm, to in moves:
+            sums[mover] = state.distance_sums[mover] + distance[to] - distance[frm]
+            corners[mover] = state.corner_counts[mover] + (to == corner) - (frm == corner)
+            goals[mover] = state.goal_counts[mover] + (goal >> to & 1) - (goal >> frm & 1)
+            scores.append(self.dot(position_terms(state, player, sums, corners, goals)))
+        return scores
+    # With two players only the mover's four features change, and with one
+    # other player its average is the mover's own value, so the changed
+    # features are the mover's terms as arrays over the children.
+    def evaluate_children_numpy(self, state, moves, player, mover):
+        distance, in_goal, on_corner = state.tables.arrays(state.distance)[mover]
+        squares = np.array(moves, dtype=np.int64)
+        frm, to = squares[:, 0], squares[:, 1]
+        goal_size = state.goal_sizes[mover]
+        goal_counts = state.goal_counts[mover] + in_goal[to] - in_goal[frm]
+        changed = (
+            (state.distance_sums[mover] + distance[to] - distance[frm]) / state.piece_counts[mover],
+            state.corner_counts[mover] + on_corner[to] - on_corner[frm],
+            goal_counts / goal_size,
+            np.where(goal_counts < goal_size, goal_counts, 0),
+        )
+        terms = list(position_terms(state, player, state.distance_sums, state.corner_counts, state.goal_counts))
+        terms[0 if mover == player else 1::2] = changed
+        return self.dot(terms).tolist()
+
+# Plays one self-play game at a fixed search depth and returns its training
+# rows as (features, label, heuristic) tuples, heuristic being the
+# hand-tuned score of the same position for comparison.
+def self_play(board_size, depth, seed, random_plies=4, explore=0.1, max_plies=300, outcome_weight=0.0, distance='euclidean'):
+    state = HalmaState(board_size, distance)
+    rng = random.Random(seed)
+    searcher = Searcher(tt_size=1 << 16)
+    positions = []
+    for ply in range(max_plies):
+        if state.check_for_win():
+            break
+        player = state.which_player
+        if ply < random_plies or rng.random() < explore:
+            moves = state.evaluate_moves(player)
+            move = rng.choice(moves) if moves else None
+        else:
+            for color in state.colors:
+                # the same search, scored from each colour's side in turn
+                searcher.new_search()
+                searcher.prepare(depth)
+                found, score = searcher.root_search(state, player, depth, color)
+                terms = position_terms(state, color, state.distance_sums, state.corner_counts, state.goal_counts)
+                positions.append((terms, score, state.heuristic(color), color))
+                if color == player:
+                    move = found
+        if move is None:
+            break
+        state.make_move(move)
+        state.switch_player()
+    state.check_for_win()
+    rows = []
+    for terms, score, heuristic, color in positions:
+        result = 0 if state.winner is None else (1 if state.winner == color else -1)
+        rows.append((terms, (1 - outcome_weight) * score + outcome_weight * OUTCOME_SCORE * result, heuristic))
+    return rows
+
+def _self_play_task(task):
+    return self_play(*task)
+
+# Solves a x = b by Gaussian elimination with partial pivoting.
+def solve(a, b):
+    n = len(b)
+    rows = [list(row) + [value] for row, value in zip(a, b)]
+    for column in range(n):
+        pivot = max(range(column, n), key=lambda r: abs(rows[r][column]))
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        if rows[column][column] == 0:
+            raise ValueError("singular system; raise the ridge")
+        for r in range(column + 1, n):
+            factor = rows[r][column] / rows[column][column]
+            if factor:
+                for c in range(column, n + 1):
+                    rows[r][c] -= factor * rows[column][c]
+    x = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        x[r] = (rows[r][n] - sum(rows[r][c] * x[c] for c in range(r + 1, n))) / rows[r][r]
+    return x
+
+# Ridge regression of the labels on the features plus a bias, which is not
+# penalized. The ridge keeps features that never vary (no piece ever on a
+# corner, say) or always move together from making the system singular.
+def fit(rows, ridge=1e-3):
+    size = len(FEATURES) + 1
+    if np is not None:
+        x = np.array([terms + (1.0,) for terms, _, _ in rows], dtype=np.float64)
+        y = np.array([label for _, label, _ in rows], dtype=np.float64)
+        penalty = np.full(size, ridge)
+        penalty[-1] = 0.0
+        solution = np.linalg.solve(x.T @ x + np.diag(penalty), x.T @ y).tolist()
+    else:
+        a = [[0.0] * size for _ in range(size)]
+        b = [0.0] * size
+        for terms, label, _ in rows:
+            x = terms + (1.0,)
+            for i in range(size):
+                b[i] += x[i] * label
+                for j in range(size):
+                    a[i][j] += x[i] * x[j]
+        for i in range(size - 1):
+            a[i][i] += ridge
+        solution = solve(a, b)
+    return solution[:-1], solution[-1]
+
+def rmse(errors):
+    errors = list(errors)
+    return math.sqrt(sum(e * e for e in errors) / len(errors)) if errors else float('nan')
+
+def train(board_size, games, depth, seed=0, random_plies=4, explore=0.1, max_plies=300, outcome_weight=0.0,
+          ridge=1e-3, holdout=0.2, distance='euclidean', workers=None):
+    tasks = [(board_size, depth, seed + game, random_plies, explore, max_plies, outcome_weight, distance) for game in range(games)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        played = list(pool.map(_self_play_task, tasks))
+    split = games - int(games * holdout)
+    training = [row for rows in played[:split] for row in rows]
+    held_out = [row for rows in played[split:] for row in rows]
+    if not training:
+        raise ValueError("the self-play games produced no training positions")
+    weights, bias = fit(training, ridge)
+    evaluator = LinearEvaluator(weights, bias, HalmaState(board_size, distance).tables.name, distance)
+    report = {
+        'games': games,
+        'training_rows': len(training),
+        'holdout_rows': len(held_out),
+        'train_rmse': rmse(evaluator.dot(terms) - label for terms, label, _ in training),
+        'holdout_rmse': rmse(evaluator.dot(terms) - label for terms, label, _ in held_out),
+        'heuristic_holdout_rmse': rmse(heuristic - label for _, label, heuristic in held_out),
+    }
+    return evaluator, report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit a linear Halma evaluation to self-play search scores.")
+    parser.add_argument('--size', type=int, default=8, help="board size")
+    parser.add_argument('--games', type=int, default=100, help="self-play games")
+    parser.add_argument('--depth', type=int, default=2, help="search depth of the self-play moves and labels")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('--random-plies', type=int, default=4, help="random opening plies per game")
+    parser.add_argument('--explore', type=float, default=0.1, help="chance of a random move after the opening")
+    parser.add_argument('--max-plies', type=int, default=300, help="plies before a game is stopped")
+    parser.add_argument('--outcome-weight', type=float, default=0.0, help="share of the game result in each label")
+    parser.add_argument('--ridge', type=float, default=1e-3, help="ridge penalty of the fit")
+    parser.add_argument('--holdout', type=float, default=0.2, help="share of games kept out of the fit")
+    parser.add_argument('--distance', default='euclidean', choices=DISTANCE_METRICS, help="goal distance metric of the features")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--out', help="weights file (default eval_<size>x<size>.json)")
+    args = parser.parse_args(argv)
+    evaluator, report = train(args.size, args.games, args.depth, args.seed, args.random_plies, args.explore, args.max_plies,
+                              args.outcome_weight, args.ridge, args.holdout, args.distance, args.workers)
+    out = args.out or f'eval_{args.size}x{args.size}.json'
+    evaluator.save(out, depth=args.depth, report=report)
+    for name, weight in zip(FEATURES, evaluator.weights):
+        print(f"{name:16}{weight:12.4f}")
+    print(f"{'bias':16}{evaluator.bias:12.4f}")
+    print(f"{report['training_rows']} training rows, {report['holdout_rows']} held out")
+    print(f"rmse: train {report['train_rmse']:.3f}, holdout {report['holdout_rmse']:.3f}, "
+          f"hand-tuned heuristic {report['heuristic_holdout_rmse']:.3f} (weights {DEFAULT_WEIGHTS})")
+    print(f"weights -> {out}")
+
+if __name__ == "__main__":
+    main()
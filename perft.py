@@ -0,0 +1,176 @@
+import argparse
+import random
+import sys
+import time
+from engine import COLORS, HalmaState, iter_bits, opponent
+
+# Perft: the number of positions reachable in exactly N plies, counting a
+# won position as a leaf. It doubles as a move generation benchmark and,
+# run against the simple reference generator below, as a check that a
+# faster generator still plays by the same rules:
+#
+#   python perft.py --size 8 --depth 3              # counts and leaves/s
+#   python perft.py --size 8 --depth 3 --check      # compare every node
+#   python perft.py --size 10 --random-games 200    # compare along random games
+#
+# Moves are counted once per (from, to) pair, however many jump chains
+# reach the destination.
+
+# The rules as the original game wrote them, kept slow and obvious on
+# purpose: a step goes to an empty neighbour, a jump goes over an occupied
+# neighbour to the empty square behind it, and jumps chain from square to
+# square, each square expanding once. The moving piece stays on its square
+# while the chain is built, so it can be jumped over and never landed on.
+def reference_destinations(occupied, rows, columns, position):
+    legal_moves = []
+    stack = [(position, False, None)]
+    visited = set()
+    while stack:
+        current_pos, jumped, prev_position = stack.pop()
+        if current_pos in visited:
+            continue
+        visited.add(current_pos)
+        row, col = current_pos
+        directions = [(row-1, col), (row+1, col), (row, col-1), (row, col+1),
+                      (row-1, col-1), (row-1, col+1), (row+1, col-1), (row+1, col+1)]
+        for r, c in directions:
+            if r < 0 or r >= rows or c < 0 or c >= columns:
+                continue
+            if (r, c) in occupied:
+                new_r, new_c = r + (r - row), c + (c - col)
+                if new_r < 0 or new_r >= rows or new_c < 0 or new_c >= columns:
+                    continue
+                if (new_r, new_c) not in occupied and (new_r, new_c) != prev_position:
+                    stack.append(((new_r, new_c), True, (row, col)))
+                    legal_moves.append((new_r, new_c))
+            elif not jumped:
+                legal_moves.append((r, c))
+    return legal_moves
+
+def reference_moves(state, player):
+    occupied = {position for position, _ in state.iter_pieces()}
+    moves = set()
+    for sq in iter_bits(state.masks[player]):
+        position = state.position(sq)
+        for destination in reference_destinations(occupied, state.rows, state.columns, position):
+            moves.add((sq, state.square(destination)))
+    return moves
+
+# The original start layout: a triangle of (size + 1) // 2 rows in two
+# opposite corners. (halma.py once used a smaller triangle; the AI game's
+# layout is the one the engine plays.)
+def reference_start_masks(board_size):
+    corner_size = (board_size + 1) // 2
+    masks = {color: 0 for color in COLORS}
+    for row in range(board_size):
+        for col in range(board_size):
+            if row < corner_size and col < corner_size and row + col < corner_size:
+                masks['green'] |= 1 << (row * board_size + col)
+            if row >= board_size - corner_size and col >= board_size - corner_size and row + col >= 2 * board_size - corner_size - 1:
+                masks['red'] |= 1 << (row * board_size + col)
+    return masks
+
+def fast_moves(state, player):
+    return set(state.evaluate_moves(player))
+
+def perft(state, player, depth, generator=fast_moves):
+    if depth == 0 or state.check_for_win():
+        return 1
+    total = 0
+    for move in generator(state, player):
+        state.make_move(move)
+        total += perft(state, opponent(player), depth - 1, generator)
+        state.unmake_move()
+    return total
+
+# Leaf counts per root move, for narrowing down where two generators part.
+def divide(state, player, depth, generator=fast_moves):
+    counts = {}
+    for move in sorted(generator(state, player)):
+        state.make_move(move)
+        counts[move] = perft(state, opponent(player), depth - 1, generator)
+        state.unmake_move()
+    return counts
+
+# The first position where the fast generator and the reference disagree,
+# as (snapshot, player, moves only fast makes, moves only the reference
+# makes), or None. Walks every node to `depth`.
+def check(state, player, depth):
+    fast = fast_moves(state, player)
+    reference = reference_moves(state, player)
+    if fast != reference:
+        return state.snapshot(), player, fast - reference, reference - fast
+    if depth == 0 or state.check_for_win():
+        return None
+    for move in fast:
+        state.make_move(move)
+        mismatch = check(state, opponent(player), depth - 1)
+        state.unmake_move()
+        if mismatch is not None:
+            return mismatch
+    return None
+
+# The same comparison along random games, which reaches the crowded middle
+# game that a shallow full-width check never sees.
+def check_random_games(board_size, games, plies, seed=0):
+    rng = random.Random(seed)
+    positions = 0
+    for _ in range(games):
+        state = HalmaState(board_size)
+        player = 'green'
+        for _ in range(plies):
+            mismatch = check(state, player, 0)
+            positions += 1
+            if mismatch is not None:
+                return mismatch, positions
+            moves = sorted(fast_moves(state, player))
+            if not moves or state.check_for_win():
+                break
+            state.make_move(rng.choice(moves))
+            player = opponent(player)
+    return None, positions
+
+def report_mismatch(mismatch):
+    snapshot, player, fast_only, reference_only = mismatch
+    print(f"MISMATCH at {snapshot} for {player}: only fast {sorted(fast_only)}, only reference {sorted(reference_only)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count Halma positions N plies deep and check the move generator.")
+    parser.add_argument('--size', type=int, default=8, help="board size")
+    parser.add_argument('--depth', type=int, default=3, help="plies to count")
+    parser.add_argument('--reference', action='store_true', help="count with the reference generator instead")
+    parser.add_argument('--divide', action='store_true', help="print the count under every root move")
+    parser.add_argument('--check', action='store_true', help="compare both generators at every node")
+    parser.add_argument('--random-games', type=int, default=0, help="also compare along this many random games")
+    parser.add_argument('--plies', type=int, default=200, help="plies per random game")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the random games")
+    args = parser.parse_args(argv)
+    state = HalmaState(args.size)
+    if state.masks != reference_start_masks(args.size):
+        print(f"MISMATCH in the start position of {args.size}x{args.size}")
+        return 1
+    generator = reference_moves if args.reference else fast_moves
+    if args.divide:
+        for move, count in divide(state, 'green', args.depth, generator).items():
+            print(f"{state.position(move[0])} -> {state.position(move[1])}: {count}")
+    for depth in range(1, args.depth + 1):
+        start = time.perf_counter()
+        count = perft(state, 'green', depth, generator)
+        seconds = time.perf_counter() - start
+        print(f"perft({depth}) = {count}  {seconds:.2f} s  {count / seconds:.0f} leaves/s")
+    if args.check:
+        mismatch = check(state, 'green', args.depth)
+        if mismatch is not None:
+            report_mismatch(mismatch)
+            return 1
+        print(f"check to depth {args.depth}: ok")
+    if args.random_games:
+        mismatch, positions = check_random_games(args.size, args.random_games, args.plies, args.seed)
+        if mismatch is not None:
+            report_mismatch(mismatch)
+            return 1
+        print(f"check over {positions} positions of {args.random_games} random games: ok")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+import argparse
+import os
+import struct
+import sys
+from array import array
+from collections import Counter, namedtuple
+from engine import HalmaState, TOPOLOGIES, get_tables
+
+# Compact game records. A file is a magic string followed by games, each a
+# fixed header and then the moves as (from, to) square pairs, one byte per
+# square (two on boards of more than 256 squares):
+#
+#   header: topology, board size, players, result, move count
+#   result: 0 for no winner, UNFINISHED while the game is being played (or
+#           if it never ended), else 1 + the winner's seat (HalmaState.colors)
+#
+# A game is either appended whole (write) or logged move by move as it is
+# played (start_game, write_move, end_game): each move goes to the end of
+# the file first and only then into the header's move count, so a game cut
+# off by a crash loses at most the move being written and the file stays
+# readable. Opening a writer trims any half-written move off the end.
+# Reading is a generator pipeline that never holds more than one game, so
+# statistics over millions of games run in constant memory:
+#
+#   python records.py games.hgr --openings 4 --top 10
+#   python records.py games.hgr --replay          # check every move too
+
+MAGIC = b'HGR1'
+GAME = struct.Struct('<BBBBH')
+TOPOLOGY_CODES = tuple(sorted(TOPOLOGIES))
+UNFINISHED = 255
+
+GameRecord = namedtuple('GameRecord', 'topology board_size players winner moves finished', defaults=(True,))
+
+def square_type(topology, board_size, players):
+    return 'B' if get_tables(board_size, topology, players).size <= 256 else 'H'
+
+# The offset just past the last whole game of an open record file, walking
+# the headers only.
+def recorded_end(f):
+    size = os.fstat(f.fileno()).st_size
+    f.seek(0)
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{f.name} is not a game record file")
+    end = len(MAGIC)
+    while end + GAME.size <= size:
+        code, board_size, players, _, count = GAME.unpack(f.read(GAME.size))
+        length = 2 * count * array(square_type(TOPOLOGY_CODES[code], board_size, players)).itemsize
+        if end + GAME.size + length > size:
+            break
+        end += GAME.size + length
+        f.seek(end)
+    return end
+
+class RecordWriter:
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self.file = open(path, 'r+b')
+            self.end = recorded_end(self.file)
+            self.file.truncate(self.end)
+        else:
+            self.file = open(path, 'w+b')
+            self.file.write(MAGIC)
+            self.end = len(MAGIC)
+        # the game being logged: its header offset and fields, square type
+        # and colours
+        self.game = None
+        self.header = None
+        self.game_squares = None
+        self.game_colors = None
+    def append(self, data):
+        self.file.seek(self.end)
+        self.file.write(data)
+        self.end += len(data)
+    def write(self, topology, board_size, players, winner, moves, colors):
+        if self.game is not None:
+            raise ValueError("cannot append a whole game while another one is being logged")
+        result = colors.index(winner) + 1 if winner is not None else 0
+        squares = array(square_type(topology, board_size, players))
+        for frm, to in moves:
+            squares.append(frm)
+            squares.append(to)
+        if sys.byteorder != 'little':
+            squares.byteswap()
+        self.append(GAME.pack(TOPOLOGY_CODES.index(topology), board_size, players, result, len(moves)) + squares.tobytes())
+        self.file.flush()
+    # Logging a game as it is played: start_game writes an UNFINISHED
+    # header, write_move appends a move and then counts it in the header,
+    # end_game sets the result (winner or None).
+    def start_game(self, state):
+        if self.game is not None:
+            self.end_game(None)
+        self.game = self.end
+        self.header = [TOPOLOGY_CODES.index(state.topology), state.board_size, state.players, UNFINISHED, 0]
+        self.game_squares = square_type(state.topology, state.board_size, state.players)
+        self.game_colors = state.colors
+        self.append(GAME.pack(*self.header))
+        self.file.flush()
+    def write_move(self, move):
+        if self.game is None:
+            raise ValueError("no game is being logged")
+        squares = array(self.game_squares, move)
+        if sys.byteorder != 'little':
+            squares.byteswap()
+        self.append(squares.tobytes())
+        self.file.flush()
+        self.header[4] += 1
+        self.write_header()
+    def end_game(self, winner):
+        if self.game is None:
+            raise ValueError("no game is being logged")
+        self.header[3] = self.game_colors.index(winner) + 1 if winner is not None else 0
+        self.write_header()
+        self.game = None
+    def write_header(self):
+        self.file.seek(self.game)
+        self.file.write(GAME.pack(*self.header))
+        self.file.flush()
+    def close(self):
+        self.file.close()
+
+def read_games(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a game record file")
+        boards = {} # header fields -> (square type, colours)
+        while True:
+            header = f.read(GAME.size)
+            if len(header) < GAME.size:
+                return
+            code, board_size, players, result, count = GAME.unpack(header)
+            topology = TOPOLOGY_CODES[code]
+            board = boards.get((code, board_size, players))
+            if board is None:
+                board = boards[(code, board_size, players)] = (square_type(topology, board_size, players), get_tables(board_size, topology, players).colors)
+            squares = array(board[0])
+            data = f.read(2 * count * squares.itemsize)
+            if len(data) < 2 * count * squares.itemsize:
+                return # cut off in the middle of a game
+            squares.frombytes(data)
+            if sys.byteorder != 'little':
+                squares.byteswap()
+            winner = board[1][result - 1] if result and result != UNFINISHED else None
+            yield GameRecord(topology, board_size, players, winner, list(zip(squares[::2], squares[1::2])), result != UNFINISHED)
+
+# Plays every game through the engine and yields (record, state) with the
+# final position. With check, a move that is not legal where it was played
+# or a finished game's winner the final position does not show raises
+# ValueError.
+def replay(records, check=True):
+    states = {}
+    for record in records:
+        board = (record.topology, record.board_size, record.players)
+        state = states.get(board)
+        if state is None:
+            state = states[board] = HalmaState(record.board_size, topology=record.topology, players=record.players)
+        state.reset()
+        for ply, move in enumerate(record.moves):
+            if check and (state.piece_at(move[0]) != state.which_player or move[1] not in state.legal_squares(move[0])):
+                raise ValueError(f"illegal move {move} at ply {ply} of a {record.topology} {record.board_size} game")
+            state.make_move(move)
+            state.switch_player()
+        state.check_for_win()
+        if check and record.finished and state.winner != record.winner:
+            raise ValueError(f"a {record.topology} {record.board_size} game records winner {record.winner}, its final position {state.winner}")
+        yield record, state
+
+# Game count, average length, wins per colour and the most played openings
+# (their first `opening_plies` moves) over a stream of records.
+def game_stats(records, opening_plies=4):
+    games = 0
+    unfinished = 0
+    plies = 0
+    wins = Counter()
+    openings = Counter()
+    for record in records:
+        games += 1
+        plies += len(record.moves)
+        if record.finished:
+            wins[record.winner] += 1
+        else:
+            unfinished += 1
+        openings[tuple(record.moves[:opening_plies])] += 1
+    return {
+        'games': games,
+        'average_length': plies / games if games else 0.0,
+        'wins': dict(wins),
+        'unfinished': unfinished,
+        'openings': openings,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Statistics over Halma game record files.")
+    parser.add_argument('paths', nargs='+', help="game record files")
+    parser.add_argument('--openings', type=int, default=4, help="plies that make up an opening")
+    parser.add_argument('--top', type=int, default=10, help="openings to list")
+    parser.add_argument('--replay', action='store_true', help="replay every game through the engine and check its moves")
+    args = parser.parse_args(argv)
+    records = (record for path in args.paths for record in read_games(path))
+    if args.replay:
+        records = (record for record, _ in replay(records))
+    stats = game_stats(records, args.openings)
+    print(f"{stats['games']} games, {stats['average_length']:.1f} plies on average")
+    for winner, count in sorted(stats['wins'].items(), key=lambda item: -item[1]):
+        print(f"  {winner or 'no winner'}: {count}")
+    if stats['unfinished']:
+        print(f"  unfinished: {stats['unfinished']}")
+    print(f"most played openings ({args.openings} plies):")
+    for opening, count in stats['openings'].most_common(args.top):
+        print(f"  {count:8}  " + ' '.join(f"{frm}-{to}" for frm, to in opening))
+
+if __name__ == "__main__":
+    main()
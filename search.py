@@ -0,0 +1,550 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from engine import DEFAULT_WEIGHTS, HalmaState
+
+# Alpha-beta search over a HalmaState. Scores are always from ai_player's
+# point of view and the side to move passes to the next player with every
+# ply. Moves are (from, to) squares.
+#
+# With more than two players the default 'paranoid' mode is the same
+# alpha-beta with every other player minimizing ai_player's score, so it
+# prunes as well as the two-player search. 'maxn' lets every player
+# maximize its own score (HalmaState.scores), which cannot prune at all.
+
+EXACT, LOWER, UPPER = 0, 1, 2
+REPLACEMENT_POLICIES = ('always', 'depth', 'generation')
+SEARCH_MODES = ('paranoid', 'maxn')
+
+class TranspositionTable:
+    # Entries only cut off a search at the depth they were searched at, which
+    # keeps the score equal to plain minimax whichever order the tree is
+    # walked in (so serial and parallel searches agree on the move).
+    #
+    # Fixed number of slots indexed by key. On a collision the policy decides
+    # who keeps the slot:
+    #   always     - the newest entry
+    #   depth      - the deeper search (ties go to the newest)
+    #   generation - entries left over from an earlier search are always
+    #                replaced, otherwise the deeper search wins
+    def __init__(self, size=1 << 18, replacement='generation'):
+        if replacement not in REPLACEMENT_POLICIES:
+            raise ValueError(f"unknown replacement policy {replacement!r}")
+        self.size = size
+        self.replacement = replacement
+        self.slots = [None] * size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+    def new_search(self):
+        self.generation += 1
+    def clear(self):
+        self.slots = [None] * self.size
+        self.hits = self.misses = self.stores = self.overwrites = 0
+    # entries are (key, depth, bound, score, best move, generation)
+    def probe(self, key):
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+    def store(self, key, depth, bound, score, move):
+        index = key % self.size
+        old = self.slots[index]
+        if old is not None:
+            if old[0] != key:
+                if self.replacement == 'depth' and old[1] > depth:
+                    return
+                if self.replacement == 'generation' and old[5] == self.generation and old[1] > depth:
+                    return
+                self.overwrites += 1
+            elif move is None:
+                move = old[4] # keep the best move we already know
+        self.slots[index] = (key, depth, bound, score, move, self.generation)
+        self.stores += 1
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            'size': self.size,
+            'used': sum(entry is not None for entry in self.slots),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'stores': self.stores,
+            'overwrites': self.overwrites,
+        }
+
+class SearchTimeout(Exception):
+    pass
+
+class Searcher:
+    # how many nodes go by between looks at the clock
+    CHECK_INTERVAL = 1024
+    MAX_PLY = 128
+    # With ordering on, moves are searched PV move first, then the table
+    # move, then the two killers of the ply, then by history score and
+    # finally by how far the move carries the piece toward its goal. With it
+    # off only the PV and table moves are moved to the front, which is handy
+    # for measuring what the rest buys.
+    #
+    # workers > 1 makes search() split the root moves over a process pool.
+    # weights picks the heuristic variant (see engine.HEURISTIC_VARIANTS).
+    # batch scores all children of a depth-1 node at once with
+    # HalmaState.evaluate_children instead of visiting them one by one.
+    # tracer (see tracing.py) receives one record per finished depth and
+    # one per search.
+    # endgame (an endgame.EndgameSolver) answers race positions at the root
+    # with the fastest way to fill the goal, without searching.
+    # mode is 'paranoid' or 'maxn' (see the top of this file); only
+    # paranoid searches split over workers.
+    # evaluator (a learn.LinearEvaluator) scores leaves instead of the
+    # heuristic with weights.
+    def __init__(self, tt_size=1 << 18, replacement='generation', ordering=True, workers=1, weights=DEFAULT_WEIGHTS, batch=True, tracer=None, endgame=None, mode='paranoid', evaluator=None):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"unknown search mode {mode!r}")
+        self.mode = mode
+        self.tt = TranspositionTable(tt_size, replacement)
+        self.tracer = tracer
+        self.endgame = endgame
+        self.weights = weights
+        self.evaluator = evaluator
+        self.batch = batch
+        self.tt_size = tt_size
+        self.replacement = replacement
+        self.ordering = ordering
+        self.workers = workers
+        self.pool = None
+        self.history = {}
+        self.killers = [[None, None] for _ in range(self.MAX_PLY)]
+        self.nodes = 0
+        # node count at which to look at the clock next; a batch of leaves
+        # adds many nodes at once, so this is a threshold, not a multiple
+        self.next_check = self.CHECK_INTERVAL
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.deadline = None
+        # set while depth 1 runs, which has to finish whatever the deadline
+        self.must_finish = False
+        self.prev_pv = []
+        self.pv = []
+        self.on_pv = False
+        self.completed_depth = 0
+        self.stop_requested = False
+    # Safe to call from another thread; the search notices within
+    # CHECK_INTERVAL nodes.
+    def stop(self):
+        self.stop_requested = True
+    def new_search(self):
+        self.tt.new_search()
+        self.nodes = 0
+        self.next_check = self.CHECK_INTERVAL
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.killers = [[None, None] for _ in range(self.MAX_PLY)]
+        # keep what history learned last move, but let it fade
+        for move in self.history:
+            self.history[move] >>= 1
+    def stats(self):
+        return {
+            'nodes': self.nodes,
+            'cutoffs': self.cutoffs,
+            # share of cutoffs produced by the first move searched
+            'first_move_cutoff_rate': self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            'completed_depth': self.completed_depth,
+            'tt': self.tt.stats(),
+        }
+    def counters(self):
+        return (time.perf_counter(), self.nodes, self.cutoffs, self.tt.hits, self.tt.misses)
+    # one trace record covering everything since `since` (from counters())
+    def trace(self, event, since, depth, move, score, **fields):
+        now = self.counters()
+        self.tracer.emit(event, depth=depth, seconds=now[0] - since[0], nodes=now[1] - since[1],
+                         cutoffs=now[2] - since[2], tt_hits=now[3] - since[3], tt_misses=now[4] - since[4],
+                         move=move, score=score, pv=self.pv, **fields)
+    # player's score of a leaf, and of all children of a node in one batch
+    def evaluate(self, state, player):
+        if self.evaluator is None:
+            return state.heuristic(player, self.weights)
+        return self.evaluator.evaluate(state, player)
+    def evaluate_children(self, state, moves, player):
+        if self.evaluator is None:
+            return state.evaluate_children(moves, player, self.weights)
+        return self.evaluator.evaluate_children(state, moves, player)
+    def scores(self, state):
+        if self.evaluator is None:
+            return state.scores(self.weights)
+        return self.evaluator.scores(state)
+    def prepare(self, depth):
+        self.deadline = None
+        self.prev_pv = []
+        self.pv_table = [[] for _ in range(depth + 2)]
+        self.on_pv = False
+    # (move, score) from the endgame solver, or None to search as usual
+    def endgame_move(self, state, player, ai_player):
+        if self.endgame is None or player != ai_player:
+            return None
+        start = time.perf_counter()
+        # the solver gives up at the search's deadline or stop() too
+        solved = self.endgame.solve(state, player, self.out_of_time)
+        if solved is None:
+            return None
+        move, moves_left = solved
+        self.nodes = self.endgame.nodes
+        self.pv = [move]
+        self.completed_depth = 0
+        score = self.evaluate(state, ai_player)
+        if self.tracer is not None:
+            self.tracer.emit('endgame', move=move, score=score, moves_left=moves_left,
+                             nodes=self.endgame.nodes, seconds=time.perf_counter() - start)
+        return move, score
+    def search(self, state, player, depth):
+        self.deadline = None
+        solved = self.endgame_move(state, player, player)
+        if solved is not None:
+            return solved
+        if self.workers > 1 and self.mode == 'paranoid':
+            return self.parallel_search(state, player, depth)
+        self.new_search()
+        self.prepare(depth)
+        if self.tracer is not None:
+            since = self.counters()
+        move, score = self.root_search(state, player, depth, player)
+        self.pv = self.pv_table[0]
+        self.completed_depth = depth
+        if self.tracer is not None:
+            self.trace('search', since, depth, move, score)
+        return move, score
+    # Root splitting: the first root move (in the serial order) is searched
+    # here to get a score to beat, then every other root move goes to a
+    # worker process with that score as alpha. A worker either fails low or
+    # comes back with the exact score, so taking the first best move in the
+    # serial order picks the same move the serial search would.
+    def parallel_search(self, state, player, depth):
+        self.new_search()
+        self.prepare(depth)
+        if self.tracer is not None:
+            since = self.counters()
+        if depth == 0 or state.check_for_win():
+            return self.minimax(state, player, depth, float('-inf'), float('inf'), player)
+        moves = state.evaluate_moves(player)
+        if len(moves) < 2:
+            return self.minimax(state, player, depth, float('-inf'), float('inf'), player)
+        key = self.node_key(state, player, player)
+        entry = self.tt.probe(key)
+        tt_move = entry[4] if entry is not None else None
+        moves = self.order_moves(state, player, moves, 0, None, tt_move)
+        best_move = moves[0]
+        state.make_move(best_move)
+        _, best_eval = self.minimax(state, state.next_player(player), depth - 1, float('-inf'), float('inf'), player, 1)
+        state.unmake_move()
+        pv = [best_move] + self.pv_table[1]
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        snapshot = state.snapshot()
+        options = (self.tt_size, self.replacement, self.ordering, 1, self.weights, self.batch, None, None, 'paranoid', self.evaluator)
+        futures = [self.pool.submit(_search_root_move, snapshot, player, move, depth, best_eval, options) for move in moves[1:]]
+        alpha = best_eval
+        for move, future in zip(moves[1:], futures):
+            score, nodes = future.result()
+            self.nodes += nodes
+            if score > best_eval:
+                best_eval = score
+                best_move = move
+                pv = [move]
+        self.tt.store(key, depth, EXACT if best_eval > alpha else LOWER, best_eval, best_move)
+        self.pv = pv
+        self.completed_depth = depth
+        if self.tracer is not None:
+            self.trace('search', since, depth, best_move, best_eval, workers=self.workers)
+        return best_move, best_eval
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+    def out_of_time(self):
+        if self.stop_requested:
+            return True
+        deadline = self.deadline
+        return deadline is not None and not self.must_finish and time.perf_counter() > deadline
+    # Gives a running iterative_deepening time_limit more seconds from now,
+    # whatever limit it started with; called from another thread to turn a
+    # ponder search into the timed search for the move that was expected.
+    def limit_time(self, time_limit):
+        self.deadline = time.perf_counter() + time_limit
+    # Search depth 1, 2, 3, ... until time_limit seconds have passed (or
+    # forever with None) and return the result of the deepest search that
+    # finished. Each iteration tries the previous principal variation first.
+    # Depth 1 always finishes so there is a move to play, unless stop()
+    # cancels the search, in which case the move may be None.
+    def iterative_deepening(self, state, player, time_limit, max_depth=64, ai_player=None):
+        if ai_player is None:
+            ai_player = player
+        # the endgame attempt comes out of the same time budget
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        solved = self.endgame_move(state, player, ai_player)
+        if solved is not None:
+            self.deadline = None
+            return solved
+        self.new_search()
+        base = len(state.history)
+        self.pv = []
+        self.completed_depth = 0
+        result = (None, self.evaluate(state, ai_player))
+        if self.tracer is not None:
+            search_since = self.counters()
+        for depth in range(1, max_depth + 1):
+            self.must_finish = depth == 1
+            self.prev_pv = self.pv
+            self.pv_table = [[] for _ in range(depth + 2)]
+            self.on_pv = True
+            if self.tracer is not None:
+                since = self.counters()
+            try:
+                move, score = self.root_search(state, player, depth, ai_player)
+            except SearchTimeout:
+                # unwind the moves the aborted search left on the board
+                while len(state.history) > base:
+                    state.unmake_move()
+                if self.tracer is not None:
+                    self.trace('depth', since, depth, None, None, aborted=True)
+                break
+            self.must_finish = False
+            result = (move, score)
+            self.pv = self.pv_table[0]
+            self.completed_depth = depth
+            if self.tracer is not None:
+                self.trace('depth', since, depth, move, score, aborted=False)
+            # limit_time() may have moved the deadline while this depth ran
+            deadline = self.deadline
+            if move is None or (deadline is not None and time.perf_counter() >= deadline):
+                break
+        self.must_finish = False
+        self.deadline = None
+        if self.tracer is not None:
+            self.trace('search', search_since, self.completed_depth, result[0], result[1], time_limit=time_limit)
+        return result
+    def root_search(self, state, player, depth, ai_player):
+        if self.mode == 'maxn':
+            move, scores = self.maxn(state, player, depth)
+            return move, scores[ai_player]
+        return self.minimax(state, player, depth, float('-inf'), float('inf'), ai_player)
+    def order_moves(self, state, player, moves, ply, pv_move, tt_move):
+        if not self.ordering:
+            for move in (tt_move, pv_move):
+                if move is not None and move in moves:
+                    moves.remove(move)
+                    moves.insert(0, move)
+            return moves
+        killers = self.killers[ply]
+        history = self.history
+        distance = state.goal_dist[player]
+        def rank(move):
+            if move == pv_move:
+                return (3, 0, 0)
+            if move == tt_move:
+                return (2, 0, 0)
+            if move == killers[0] or move == killers[1]:
+                return (1, 0, 0)
+            frm, to = move
+            return (0, history.get(move, 0), distance[frm] - distance[to])
+        moves.sort(key=rank, reverse=True)
+        return moves
+    def record_cutoff(self, move, depth, ply, index):
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if not self.ordering:
+            return
+        killers = self.killers[ply]
+        if move != killers[0]:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move] = self.history.get(move, 0) + depth * depth
+    def node_key(self, state, player, ai_player):
+        tables = state.tables
+        # the same squares with a different side to move, or scored for the
+        # other side, is a different node
+        return state.key ^ tables.side_keys[player] ^ tables.perspective_keys[ai_player]
+    def minimax(self, state, player, depth, alpha, beta, ai_player, ply=0):
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.next_check = self.nodes + self.CHECK_INTERVAL
+            if self.out_of_time():
+                raise SearchTimeout()
+        self.pv_table[ply] = []
+        if depth == 0 or state.check_for_win():
+            return None, self.evaluate(state, ai_player)
+        alpha_orig, beta_orig = alpha, beta
+        key = self.node_key(state, player, ai_player)
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            _, entry_depth, bound, score, tt_move, _ = entry
+            # the root has to come back with a move, so it always searches
+            if entry_depth == depth and ply > 0:
+                if bound == EXACT:
+                    self.pv_table[ply] = [tt_move] if tt_move is not None else []
+                    return tt_move, score
+                if bound == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    self.pv_table[ply] = [tt_move] if tt_move is not None else []
+                    return tt_move, score
+        moves = state.evaluate_moves(player)
+        if not moves:  # If there are no legal moves, end the search
+            return None, self.evaluate(state, ai_player)
+        on_pv = self.on_pv
+        pv_move = None
+        if on_pv and ply < len(self.prev_pv) and self.prev_pv[ply] in moves:
+            pv_move = self.prev_pv[ply]
+        moves = self.order_moves(state, player, moves, ply, pv_move, tt_move)
+        next_player = state.next_player(player)
+        if depth == 1 and self.batch:
+            # the children are all leaves: score them in one pass
+            scores = self.evaluate_children(state, moves, ai_player)
+            self.nodes += len(moves)
+            pick = max if player == ai_player else min
+            index = pick(range(len(moves)), key=scores.__getitem__)
+            best_move = moves[index]
+            best_eval = scores[index]
+            self.pv_table[ply] = [best_move]
+        elif player == ai_player:
+            best_move = None
+            best_eval = float('-inf')
+            for index, move in enumerate(moves):
+                self.on_pv = on_pv and move == pv_move
+                state.make_move(move)
+                _, eval = self.minimax(state, next_player, depth - 1, alpha, beta, ai_player, ply + 1)
+                state.unmake_move()
+                if eval > best_eval:
+                    best_eval = eval
+                    best_move = move
+                    self.pv_table[ply] = [move] + self.pv_table[ply + 1]
+                alpha = max(alpha, eval)
+                if beta <= alpha:
+                    self.record_cutoff(move, depth, ply, index)
+                    break
+        else:
+            best_move = None
+            best_eval = float('inf')
+            for index, move in enumerate(moves):
+                self.on_pv = on_pv and move == pv_move
+                state.make_move(move)
+                _, eval = self.minimax(state, next_player, depth - 1, alpha, beta, ai_player, ply + 1)
+                state.unmake_move()
+                if eval < best_eval:
+                    best_eval = eval
+                    best_move = move
+                    self.pv_table[ply] = [move] + self.pv_table[ply + 1]
+                beta = min(beta, eval)
+                if beta <= alpha:
+                    self.record_cutoff(move, depth, ply, index)
+                    break
+        if best_eval <= alpha_orig:
+            bound = UPPER
+        elif best_eval >= beta_orig:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(key, depth, bound, best_eval, best_move)
+        return best_move, best_eval
+    # Max-n: returns the best move for player and the scores of every player
+    # it leads to. Ties keep the first move in search order.
+    def maxn(self, state, player, depth, ply=0):
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.next_check = self.nodes + self.CHECK_INTERVAL
+            if self.out_of_time():
+                raise SearchTimeout()
+        self.pv_table[ply] = []
+        if depth == 0 or state.check_for_win():
+            return None, self.scores(state)
+        moves = state.evaluate_moves(player)
+        if not moves:
+            return None, self.scores(state)
+        on_pv = self.on_pv
+        pv_move = None
+        if on_pv and ply < len(self.prev_pv) and self.prev_pv[ply] in moves:
+            pv_move = self.prev_pv[ply]
+        moves = self.order_moves(state, player, moves, ply, pv_move, None)
+        if depth == 1 and self.batch:
+            # only the mover's own score picks among leaves, so batch that
+            # and work out every player's score for the chosen child alone
+            own = self.evaluate_children(state, moves, player)
+            self.nodes += len(moves)
+            best_move = moves[max(range(len(moves)), key=own.__getitem__)]
+            state.make_move(best_move)
+            best_scores = self.scores(state)
+            state.unmake_move()
+            self.pv_table[ply] = [best_move]
+            return best_move, best_scores
+        next_player = state.next_player(player)
+        best_move = None
+        best_scores = None
+        for move in moves:
+            self.on_pv = on_pv and move == pv_move
+            state.make_move(move)
+            _, scores = self.maxn(state, next_player, depth - 1, ply + 1)
+            state.unmake_move()
+            if best_scores is None or scores[player] > best_scores[player]:
+                best_scores = scores
+                best_move = move
+                self.pv_table[ply] = [move] + self.pv_table[ply + 1]
+        return best_move, best_scores
+
+# Runs iterative deepening on a private copy of the position in a daemon
+# thread, so a UI thread can keep handling events and poll running() until
+# the result is in. cancel() stops the search and throws its result away.
+# A search that raised leaves result None and the exception in error.
+class BackgroundSearch:
+    def __init__(self, searcher):
+        self.searcher = searcher
+        self.thread = None
+        self.result = None
+        self.error = None
+    def start(self, state, player, time_limit, ai_player=None):
+        self.cancel()
+        position = HalmaState.from_snapshot(state.snapshot())
+        self.thread = threading.Thread(target=self.run, args=(position, player, time_limit, ai_player), daemon=True)
+        self.thread.start()
+    def run(self, position, player, time_limit, ai_player):
+        try:
+            result = self.searcher.iterative_deepening(position, player, time_limit, ai_player=ai_player)
+        except Exception as error:
+            self.error = error
+            return
+        if not self.searcher.stop_requested:
+            self.result = result
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+    # let a search started without a time limit run time_limit more seconds
+    def limit_time(self, time_limit):
+        self.searcher.limit_time(time_limit)
+    def cancel(self):
+        if self.thread is not None:
+            self.searcher.stop()
+            self.thread.join()
+            self.thread = None
+        self.searcher.stop_requested = False
+        self.result = None
+        self.error = None
+
+# Each worker process keeps one Searcher per set of options, so its table
+# and history carry over from one root move to the next.
+_worker_searchers = {}
+
+def _search_root_move(snapshot, player, move, depth, alpha, options):
+    searcher = _worker_searchers.get(repr(options))
+    if searcher is None:
+        searcher = _worker_searchers[repr(options)] = Searcher(*options)
+    searcher.new_search()
+    searcher.prepare(depth)
+    state = HalmaState.from_snapshot(snapshot)
+    state.make_move(move)
+    _, score = searcher.minimax(state, state.next_player(player), depth - 1, alpha, float('inf'), player, 1)
+    return score, searcher.nodes
@@ -0,0 +1,207 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from engine import COLORS, DISTANCE_METRICS, HEURISTIC_VARIANTS, HalmaState, load_distance_tables, opponent
+from endgame import EndgameSolver
+from learn import LinearEvaluator
+from records import RecordWriter
+from search import Searcher
+from tracing import JsonlTracer
+
+# Headless AI-vs-AI tournaments. Every combination of board size and pair of
+# (depth, heuristic variant) players is played --games times across a pool
+# of processes, and each game with its per-move search time and node count
+# goes into a SQLite database:
+#
+#   python tournament.py --games 100 --sizes 8 10 --depths 1 2 3 \
+#       --variants default no_blocking --workers 8 --db results.sqlite
+#
+# Searches are deterministic, so each game opens with a few random moves
+# (seeded by the game number) to make the games differ. --endgame lets both
+# players solve race positions exactly (see endgame.py), and --record also
+# appends every game to a game record file (see records.py). The variant
+# 'learned' scores with the weights file given by --evaluator (see learn.py).
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    args TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    board_size INTEGER NOT NULL,
+    green_depth INTEGER NOT NULL,
+    green_variant TEXT NOT NULL,
+    red_depth INTEGER NOT NULL,
+    red_variant TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    winner TEXT,
+    plies INTEGER NOT NULL,
+    search_time REAL NOT NULL,
+    nodes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS moves (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    ply INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    from_square INTEGER NOT NULL,
+    to_square INTEGER NOT NULL,
+    search_time REAL NOT NULL,
+    nodes INTEGER NOT NULL,
+    PRIMARY KEY (game_id, ply)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS games_config ON games (board_size, green_depth, green_variant, red_depth, red_variant);
+'''
+
+# Plays one game and returns its result row and per-move rows. Random
+# opening plies are recorded with zero search time and nodes.
+def play_game(board_size, green, red, seed, random_plies=4, max_plies=400, distance='euclidean', trace=None, endgame=False, evaluator=None):
+    state = HalmaState(board_size, distance)
+    learned = LinearEvaluator.load(evaluator) if evaluator else None
+    if learned is not None and not learned.matches(state):
+        raise ValueError(f"{evaluator} was fitted on {learned.board} with {learned.distance} distances")
+    rng = random.Random(seed)
+    players = {}
+    for color, (depth, variant) in (('green', green), ('red', red)):
+        tracer = JsonlTracer(trace, seed=seed, board_size=board_size, player=color) if trace else None
+        solver = EndgameSolver() if endgame else None
+        if variant == 'learned':
+            searcher = Searcher(tt_size=1 << 16, tracer=tracer, endgame=solver, evaluator=learned)
+        else:
+            searcher = Searcher(tt_size=1 << 16, weights=HEURISTIC_VARIANTS[variant], tracer=tracer, endgame=solver)
+        players[color] = (depth, searcher)
+    moves = []
+    player = 'green'
+    for ply in range(max_plies):
+        if state.check_for_win():
+            break
+        if ply < random_plies:
+            legal = state.evaluate_moves(player)
+            move = rng.choice(legal) if legal else None
+            search_time = 0.0
+            nodes = 0
+        else:
+            depth, searcher = players[player]
+            start = time.perf_counter()
+            move, _ = searcher.search(state, player, depth)
+            search_time = time.perf_counter() - start
+            nodes = searcher.nodes
+        if move is None:
+            break
+        state.make_move(move)
+        moves.append((ply, player, move[0], move[1], search_time, nodes))
+        player = opponent(player)
+    state.check_for_win()
+    for _, searcher in players.values():
+        if searcher.tracer is not None:
+            searcher.tracer.close()
+    game = {
+        'board_size': board_size,
+        'green': green,
+        'red': red,
+        'seed': seed,
+        'winner': state.winner,
+        'plies': len(moves),
+        'search_time': sum(m[4] for m in moves),
+        'nodes': sum(m[5] for m in moves),
+    }
+    return game, moves
+
+def _play_task(task):
+    return play_game(*task)
+
+def tasks(args):
+    players = list(itertools.product(args.depths, args.variants))
+    seed = args.seed
+    for board_size in args.sizes:
+        for green, red in itertools.product(players, players):
+            for _ in range(args.games):
+                yield (board_size, green, red, seed, args.random_plies, args.max_plies, args.distance, args.trace, args.endgame, args.evaluator)
+                seed += 1
+
+def open_db(path):
+    db = sqlite3.connect(path)
+    # one writer, many rows: WAL and relaxed syncing keep inserts cheap
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.executescript(SCHEMA)
+    return db
+
+def store_games(db, run_id, results, per_move, recorder=None):
+    for game, moves in results:
+        if recorder is not None:
+            recorder.write('square', game['board_size'], 2, game['winner'], [(move[2], move[3]) for move in moves], COLORS)
+        cursor = db.execute(
+            'INSERT INTO games (run_id, board_size, green_depth, green_variant, red_depth, red_variant, seed, winner, plies, search_time, nodes) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (run_id, game['board_size'], game['green'][0], game['green'][1], game['red'][0], game['red'][1],
+             game['seed'], game['winner'], game['plies'], game['search_time'], game['nodes']))
+        if per_move:
+            game_id = cursor.lastrowid
+            db.executemany('INSERT INTO moves VALUES (?, ?, ?, ?, ?, ?, ?)', [(game_id,) + move for move in moves])
+    db.commit()
+
+def run(args):
+    db = open_db(args.db)
+    run_id = db.execute('INSERT INTO runs (started, args) VALUES (?, ?)', (time.time(), json.dumps(vars(args)))).lastrowid
+    db.commit()
+    recorder = RecordWriter(args.record) if args.record else None
+    pending = tasks(args)
+    done = 0
+    batch = []
+    start = time.time()
+    # keep a bounded number of games in flight so huge runs do not queue
+    # every task up front
+    initializer = load_distance_tables if args.distance_tables else None
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=initializer, initargs=(args.distance_tables,)) as pool:
+        in_flight = {pool.submit(_play_task, task) for task in itertools.islice(pending, args.workers * 4)}
+        while in_flight:
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                batch.append(future.result())
+                done += 1
+            for task in itertools.islice(pending, len(finished)):
+                in_flight.add(pool.submit(_play_task, task))
+            if len(batch) >= args.batch_size:
+                store_games(db, run_id, batch, args.per_move, recorder)
+                batch = []
+                print(f"{done} games, {done / (time.time() - start):.1f} games/s")
+    store_games(db, run_id, batch, args.per_move, recorder)
+    db.close()
+    if recorder is not None:
+        recorder.close()
+    print(f"run {run_id}: {done} games in {time.time() - start:.1f} s -> {args.db}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play headless AI-vs-AI Halma tournaments into a SQLite database.")
+    parser.add_argument('--games', type=int, default=10, help="games per configuration")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8], help="board sizes")
+    parser.add_argument('--depths', type=int, nargs='+', default=[2], help="search depths")
+    parser.add_argument('--variants', nargs='+', default=['default'], choices=sorted(HEURISTIC_VARIANTS) + ['learned'], help="heuristic variants")
+    parser.add_argument('--distance', default='euclidean', choices=DISTANCE_METRICS, help="goal distance metric of the heuristic")
+    parser.add_argument('--distance-tables', help="JSON file from engine.save_distance_tables to load instead of building tables")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--db', default='tournament.sqlite', help="SQLite file to append results to")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('--random-plies', type=int, default=4, help="random opening plies per game")
+    parser.add_argument('--max-plies', type=int, default=400, help="plies before a game is called a draw")
+    parser.add_argument('--batch-size', type=int, default=100, help="games per database commit")
+    parser.add_argument('--endgame', action='store_true', help="solve race endgames exactly instead of searching them")
+    parser.add_argument('--record', help="append every game to this game record file")
+    parser.add_argument('--trace', help="append a JSON-lines search trace to this file")
+    parser.add_argument('--no-moves', dest='per_move', action='store_false', help="store only per-game rows")
+    parser.add_argument('--evaluator', help="weights file from learn.py for the 'learned' variant")
+    args = parser.parse_args(argv)
+    if 'learned' in args.variants and not args.evaluator:
+        parser.error("the 'learned' variant needs --evaluator")
+    run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import json
+import os
+import time
+
+# Structured search tracing. A Searcher only builds trace records when it
+# has a tracer, and then only once per finished depth and per search, so
+# leaving tracing off costs nothing inside the search itself.
+#
+# Records are JSON lines, e.g.
+#   {"event": "depth", "depth": 3, "nodes": 2608, "cutoffs": 139, ...}
+#   {"event": "search", "move": [1, 33], "score": 0.7, "pv": [[1, 33], ...], ...}
+
+class JsonlTracer:
+    # context is merged into every record (a game id, a board size, ...)
+    def __init__(self, path, **context):
+        self.path = path
+        self.context = context
+        # appends from several processes to one file stay whole lines
+        self.file = open(path, 'a')
+    def emit(self, event, **fields):
+        record = {'event': event, 'time': time.time(), 'pid': os.getpid()}
+        record.update(self.context)
+        record.update(fields)
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+    def close(self):
+        self.file.close()